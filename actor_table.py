@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Sequence
+
+import numpy as np  # type: ignore
+
+from row_table import RowTable
+
+if TYPE_CHECKING:
+    from entity import Actor
+
+
+class ActorTable(RowTable["Actor"]):
+    """Struct-of-arrays copy of the actors on a map, for vectorized queries.
+
+    The actors themselves stay the source of truth.  The owning GameMap
+    writes a row whenever an actor is added, moves or dies, and a Fighter
+    writes its row whenever its stats change.
+    """
+
+    columns = {
+        "x": (np.int32, ()),
+        "y": (np.int32, ()),
+        "hp": (np.int32, ()),
+        "power": (np.int32, ()),
+        "defense": (np.int32, ()),
+        # False for dead actors.
+        "alive": (np.bool_, ()),
+        # True while the actor's AI may act away from the player, see
+        # `BaseAI.dormant`.
+        "awake": (np.bool_, ()),
+        # When the actor was added, which is its place in the turn order.
+        "order": (np.int64, ()),
+    }
+
+    def __init__(self, capacity: int = 64):
+        super().__init__(capacity)
+        self._next_order = 0
+
+    def update(self, actor: Actor) -> None:
+        """Write the current state of `actor`, adding a row for it if needed."""
+        if actor not in self.rows:
+            row = self.row_of(actor)
+            self.order[row] = self._next_order
+            self._next_order += 1
+        else:
+            row = self.rows[actor]
+        self.x[row] = actor.x
+        self.y[row] = actor.y
+        self.hp[row] = actor.fighter.hp
+        self.power[row] = actor.fighter.power
+        self.defense[row] = actor.fighter.defense
+        self.alive[row] = actor.is_alive
+        self.update_awake(actor)
+
+    def add_many(self, actors: Sequence[Actor]) -> None:
+        """Add rows for `actors`, none of which are in this table yet, in one pass."""
+        rows = self.add_rows(actors)
+        count = len(actors)
+        self.x[rows] = np.fromiter((actor.x for actor in actors), np.int32, count)
+        self.y[rows] = np.fromiter((actor.y for actor in actors), np.int32, count)
+        self.hp[rows] = np.fromiter((actor.fighter.hp for actor in actors), np.int32, count)
+        self.power[rows] = np.fromiter((actor.fighter.power for actor in actors), np.int32, count)
+        self.defense[rows] = np.fromiter((actor.fighter.defense for actor in actors), np.int32, count)
+        self.alive[rows] = np.fromiter((actor.is_alive for actor in actors), np.bool_, count)
+        self.awake[rows] = np.fromiter(
+            (actor.ai is not None and not actor.ai.dormant for actor in actors), np.bool_, count
+        )
+        self.order[rows] = np.arange(self._next_order, self._next_order + count)
+        self._next_order += count
+
+    def update_awake(self, actor: Actor) -> None:
+        """Write whether the AI of `actor` is awake, after it may have changed."""
+        ai = actor.ai
+        self.awake[self.rows[actor]] = ai is not None and not ai.dormant
+
+    def remove(self, actor: Actor) -> None:
+        self.alive[self.rows[actor]] = False
+        super().remove(actor)
+
+    def actors_in_radius(self, x: int, y: int, radius: int) -> List[Actor]:
+        """Return the living actors within `radius` tiles of (x, y)."""
+        dx = self.x - x
+        dy = self.y - y
+        mask = self.alive & (dx * dx + dy * dy <= radius * radius)
+        return [self.entities[row] for row in np.flatnonzero(mask)]  # type: ignore
+
+    def active_actors(self, x1: int, y1: int, x2: int, y2: int) -> List[Actor]:
+        """Return the living actors inside the x1, y1, x2, y2 box (exclusive)
+        or awake anywhere, in turn order."""
+        in_box = (self.x >= x1) & (self.x < x2) & (self.y >= y1) & (self.y < y2)
+        rows = np.flatnonzero(self.alive & (self.awake | in_box))
+        rows = rows[np.argsort(self.order[rows], kind="stable")]
+        return [self.entities[row] for row in rows]  # type: ignore
@@ -0,0 +1 @@
+"""Benchmarks package. Run a benchmark from the project root with `python -m benchmarks.<name>`."""
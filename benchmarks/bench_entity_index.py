@@ -0,0 +1,86 @@
+"""Measure entity lookups and enemy turns as the number of actors grows.
+
+With the spatial index on GameMap the cost of a lookup should stay flat, and
+since only actors near the player or awake take a turn, the cost of a turn
+should grow only with the number of those, not with the size of the floor.
+"""
+from __future__ import annotations
+
+import random
+import time
+from typing import Optional
+
+from engine import Engine
+import entity_factories
+from entity import Entity
+from game_map import GameMap
+import tile_types
+
+MAP_WIDTH = 400
+MAP_HEIGHT = 400
+ACTOR_COUNTS = (100, 1000, 5000, 20000)
+TURNS = 5
+LOOKUPS = 20000
+
+
+def linear_blocking_entity_at_location(game_map: GameMap, x: int, y: int) -> Optional[Entity]:
+    """The lookup GameMap used before the spatial index, kept for comparison."""
+    for entity in game_map.entities:
+        if entity.blocks_movement and entity.x == x and entity.y == y:
+            return entity
+    return None
+
+
+def build_engine(actor_count: int, seed: int = 0) -> Engine:
+    """Return an engine on an open map populated with `actor_count` orcs."""
+    rng = random.Random(seed)
+    engine = Engine(player=entity_factories.player.build(), seed=seed)
+    game_map = GameMap(engine, MAP_WIDTH, MAP_HEIGHT)
+    game_map.set_tiles(..., tile_types.floor_id)
+    engine.game_map = game_map
+    engine.player.place(MAP_WIDTH // 2, MAP_HEIGHT // 2, game_map)
+
+    cells = [divmod(cell, MAP_HEIGHT) for cell in rng.sample(range(MAP_WIDTH * MAP_HEIGHT), actor_count + 1)]
+    positions = [cell for cell in cells if cell != (engine.player.x, engine.player.y)]
+    entity_factories.orc.spawn_many(game_map, positions[:actor_count])
+
+    engine.update_fov()
+    return engine
+
+
+def main() -> None:
+    print(f"{'actors':>8} {'ms/turn':>10} {'us/actor':>10} {'us/lookup':>10} {'us/scan':>10}")
+    for actor_count in ACTOR_COUNTS:
+        engine = build_engine(actor_count)
+        game_map = engine.game_map
+        rng = random.Random(1)
+        points = [
+            (rng.randrange(MAP_WIDTH), rng.randrange(MAP_HEIGHT)) for _ in range(LOOKUPS)
+        ]
+
+        start = time.perf_counter()
+        for x, y in points:
+            game_map.get_blocking_entity_at_location(x, y)
+        lookup = (time.perf_counter() - start) / LOOKUPS
+
+        # The old linear scan is too slow to run the full set of points.
+        scan_points = points[: min(LOOKUPS, LOOKUPS * 100 // actor_count)]
+        start = time.perf_counter()
+        for x, y in scan_points:
+            linear_blocking_entity_at_location(game_map, x, y)
+        scan = (time.perf_counter() - start) / len(scan_points)
+
+        start = time.perf_counter()
+        for _ in range(TURNS):
+            engine.handle_enemy_turns()
+            engine.update_fov()
+        turn = (time.perf_counter() - start) / TURNS
+
+        print(
+            f"{actor_count:>8} {turn * 1e3:>10.2f} {turn / actor_count * 1e6:>10.2f}"
+            f" {lookup * 1e6:>10.3f} {scan * 1e6:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
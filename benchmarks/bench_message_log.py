@@ -0,0 +1,56 @@
+"""Compare rendering the message log with cached wrapped lines against re-wrapping every frame.
+
+Both the HUD log and a full-screen history view are timed.
+"""
+from __future__ import annotations
+
+import textwrap
+import time
+from typing import Callable, Reversible
+
+import tcod
+
+from message_log import Message, MessageLog
+
+MESSAGES = 10000
+FRAMES = 2000
+HUD = (21, 45, 40, 5)
+HISTORY = (4, 4, 72, 42)
+
+
+def render_rewrapping(
+    console: tcod.console.Console, x: int, y: int, width: int, height: int, messages: Reversible[Message]
+) -> None:
+    """How MessageLog.render_messages worked before wrapped lines were cached."""
+    y_offset = height - 1
+    for message in reversed(messages):
+        for line in reversed(textwrap.wrap(message.full_text, width)):
+            console.print(x=x, y=y + y_offset, string=line, fg=message.fg)
+            y_offset -= 1
+            if y_offset < 0:
+                return
+
+
+def time_frames(render: Callable[[], None]) -> float:
+    """Return the mean time in seconds of one call to `render`."""
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        render()
+    return (time.perf_counter() - start) / FRAMES
+
+
+def main() -> None:
+    log = MessageLog()
+    for i in range(MESSAGES):
+        log.add_message(f"The orc attacks the player for {i % 7} hit points, and the player is not amused.")
+    console = tcod.console.Console(80, 50, order="F")
+
+    print(f"{'view':>8} {'rewrap us':>10} {'cached us':>10}")
+    for name, (x, y, width, height) in (("hud", HUD), ("history", HISTORY)):
+        rewrap = time_frames(lambda: render_rewrapping(console, x, y, width, height, log.messages))
+        cached = time_frames(lambda: log.render_messages(console, x, y, width, height, log.messages))
+        print(f"{name:>8} {rewrap * 1e6:>10.1f} {cached * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
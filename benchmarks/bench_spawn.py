@@ -0,0 +1,63 @@
+"""Compare spawning actors by deep-copying a prototype, building them from a template
+one at a time, and spawning them in a batch."""
+from __future__ import annotations
+
+import copy
+import time
+from typing import Callable
+
+from engine import Engine
+import entity_factories
+from game_map import GameMap
+
+MAP_WIDTH = 200
+MAP_HEIGHT = 200
+COUNTS = (1000, 10000, 40000)
+REPEAT = 3
+
+
+def new_map() -> GameMap:
+    engine = Engine(player=entity_factories.player.build(), seed=0)
+    return GameMap(engine, MAP_WIDTH, MAP_HEIGHT)
+
+
+def time_spawn(count: int, spawn: Callable[[GameMap, list], object]) -> float:
+    """Return the best time in seconds taken to spawn `count` orcs onto a new map."""
+    positions = [divmod(cell, MAP_HEIGHT) for cell in range(count)]
+    best = float("inf")
+    for _ in range(REPEAT):
+        game_map = new_map()
+        start = time.perf_counter()
+        spawn(game_map, positions)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    prototype = entity_factories.orc.build()
+
+    def deepcopy_spawn(game_map: GameMap, positions: list) -> None:
+        # How actors were spawned before templates, kept for comparison.
+        for x, y in positions:
+            clone = copy.deepcopy(prototype)
+            clone.x, clone.y = x, y
+            clone.game_map = game_map
+            game_map.add_entity(clone)
+
+    def template_spawn(game_map: GameMap, positions: list) -> None:
+        for x, y in positions:
+            entity_factories.orc.spawn(game_map, x, y)
+
+    print(f"{'actors':>8} {'deepcopy ms':>12} {'spawn ms':>10} {'spawn_many ms':>14} {'vs spawn':>9} {'vs deepcopy':>12}")
+    for count in COUNTS:
+        deepcopy_time = time_spawn(count, deepcopy_spawn)
+        template_time = time_spawn(count, template_spawn)
+        many_time = time_spawn(count, entity_factories.orc.spawn_many)
+        print(
+            f"{count:>8} {deepcopy_time * 1e3:>12.1f} {template_time * 1e3:>10.1f}"
+            f" {many_time * 1e3:>14.1f} {template_time / many_time:>8.1f}x {deepcopy_time / many_time:>11.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Time each stage of the turn pipeline over a grid of map sizes and monster densities.
+
+Every stage is measured separately on floors generated from a fixed seed and
+the results are written as JSON, so runs from different commits can be
+compared:
+
+    python -m benchmarks.bench_turn_pipeline --output before.json
+    python -m benchmarks.bench_turn_pipeline --compare before.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+import tcod
+
+from engine import Engine
+import entity_factories
+from procgen import generate_dungeon
+import setup_game
+
+DEFAULT_SIZES = "80x43,250x250,500x500,1000x1000"
+DEFAULT_DENSITIES = "2,10"
+
+# Room attempts per map cell, matching the 30 attempts on the default 80x43 map.
+ROOM_ATTEMPTS_PER_CELL = 30 / (80 * 43)
+MESSAGE_LOG_SIZE = 1000
+
+
+def parse_sizes(text: str) -> List[Tuple[int, int]]:
+    sizes = []
+    for item in text.split(","):
+        width, height = item.lower().split("x")
+        sizes.append((int(width), int(height)))
+    return sizes
+
+
+def time_calls(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """Call `func` `repeat` times and return timing statistics in milliseconds.
+
+    `setup` is called untimed before every call.
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e3)
+    return {
+        "runs": repeat,
+        "min_ms": min(samples),
+        "median_ms": float(np.median(samples)),
+        "mean_ms": float(np.mean(samples)),
+        "max_ms": max(samples),
+    }
+
+
+def room_attempts(width: int, height: int) -> int:
+    return max(30, int(width * height * ROOM_ATTEMPTS_PER_CELL))
+
+
+def bench_floor(width: int, height: int, max_monsters_per_room: int, seed: int, repeat: int) -> List[Dict[str, Any]]:
+    """Return the results for every stage on one floor configuration."""
+    max_rooms = room_attempts(width, height)
+    engine = setup_game.new_game(
+        seed=seed,
+        map_width=width,
+        map_height=height,
+        max_rooms=max_rooms,
+        max_monsters_per_room=max_monsters_per_room,
+    )
+    game_map = engine.game_map
+    monsters = sum(1 for actor in game_map.actors if actor is not engine.player)
+
+    def generate() -> None:
+        fresh_engine = Engine(player=entity_factories.player.build(), seed=seed)
+        generate_dungeon(
+            max_rooms=max_rooms,
+            room_min_size=6,
+            room_max_size=10,
+            map_width=width,
+            map_height=height,
+            max_monsters_per_room=max_monsters_per_room,
+            engine=fresh_engine,
+            rng=fresh_engine.floor_rng(1),
+        )
+
+    map_console = tcod.console.Console(width, height, order="F")
+    log_console = tcod.console.Console(80, 50, order="F")
+    for i in range(MESSAGE_LOG_SIZE):
+        engine.message_log.add_message(f"Message number {i} in a fairly long benchmark log.")
+
+    stages = {
+        "generate_dungeon": time_calls(generate, repeat),
+        # The player waits in place, so enemies that see them close in.
+        "handle_enemy_turns": time_calls(engine.handle_enemy_turns, repeat, setup=engine.update_fov),
+        "update_fov": time_calls(engine.update_fov, repeat),
+        "game_map_render": time_calls(lambda: game_map.render(map_console), repeat),
+        "message_log_render": time_calls(
+            lambda: engine.message_log.render(console=log_console, x=21, y=45, width=40, height=5), repeat
+        ),
+    }
+
+    return [
+        {
+            "map_width": width,
+            "map_height": height,
+            "max_monsters_per_room": max_monsters_per_room,
+            "monsters": monsters,
+            "seed": seed,
+            "stage": stage,
+            **stats,
+        }
+        for stage, stats in stages.items()
+    ]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(result: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (result["map_width"], result["map_height"], result["max_monsters_per_room"], result["stage"])
+
+
+def print_comparison(baseline: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """Print the median time of every stage relative to a baseline run."""
+    previous = {result_key(result): result for result in baseline["results"]}
+    for result in current["results"]:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        ratio = result["median_ms"] / max(old["median_ms"], 1e-9)
+        print(
+            f"{result['map_width']}x{result['map_height']} d={result['max_monsters_per_room']}"
+            f" {result['stage']:<20} {old['median_ms']:>10.3f}ms -> {result['median_ms']:>10.3f}ms"
+            f" ({ratio:.2f}x)",
+            file=sys.stderr,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated WIDTHxHEIGHT list")
+    parser.add_argument("--densities", default=DEFAULT_DENSITIES, help="comma separated max monsters per room")
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    args = parser.parse_args()
+
+    results = []
+    for width, height in parse_sizes(args.sizes):
+        for density in (int(item) for item in args.densities.split(",")):
+            results.extend(bench_floor(width, height, density, args.seed, args.repeat))
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "tcod": tcod.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from typing import Any, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+
+class BitMask:
+    """A 2D boolean mask stored with one bit per cell.
+
+    Indexing works like a numpy bool array of `shape` for the cases the game
+    needs: `mask[x, y]` with ints returns a bool, with integer arrays returns
+    a bool array, and with step-1 slices returns an unpacked copy of that
+    box.  Assigning to a box only repacks the bytes that cover it, so
+    `mask[box] |= values` costs about the size of the box.
+    """
+
+    def __init__(self, width: int, height: int, fill: bool = False):
+        self.shape = (width, height)
+        # Bits run along y, the first cell of each byte in its high bit.
+        self.bits = np.full((width, (height + 7) // 8), 0xFF if fill else 0, dtype=np.uint8)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def __array__(self, dtype: Any = None, copy: Optional[bool] = None) -> np.ndarray:
+        mask = self.unpack()
+        return mask if dtype is None else mask.astype(dtype)
+
+    def unpack(self) -> np.ndarray:
+        """Return the whole mask as a bool array."""
+        return self[:, :]
+
+    def __getitem__(self, key: Any) -> Any:
+        x, y = self._split(key)
+        if isinstance(x, (int, np.integer)) and isinstance(y, (int, np.integer)):
+            x, y = self._cell(x, y)
+            # `item` skips creating a numpy scalar, which matters on hot paths.
+            return (self.bits.item(x, y >> 3) >> (7 - (y & 7))) & 1 == 1
+        if isinstance(x, slice) or isinstance(y, slice):
+            x1, x2, y1, y2 = self._box(x, y)
+            if x1 >= x2 or y1 >= y2:
+                return np.zeros((max(x2 - x1, 0), max(y2 - y1, 0)), dtype=bool)
+            first_bit = y1 & ~7
+            return self._unpack_bytes(x1, x2, y1, y2)[:, y1 - first_bit : y2 - first_bit]
+        x, y = np.asarray(x), np.asarray(y)
+        return ((self.bits[x, y >> 3] >> (7 - (y & 7))) & 1).astype(bool)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        x, y = self._split(key)
+        if isinstance(x, (int, np.integer)):
+            x = slice(x, x + 1 if x != -1 else None)
+        if isinstance(y, (int, np.integer)):
+            y = slice(y, y + 1 if y != -1 else None)
+        x1, x2, y1, y2 = self._box(x, y)
+        if x1 >= x2 or y1 >= y2:
+            return
+        first_bit = y1 & ~7
+        unpacked = self._unpack_bytes(x1, x2, y1, y2)
+        unpacked[:, y1 - first_bit : y2 - first_bit] = value
+        self.bits[x1:x2, y1 >> 3 : (y2 + 7) >> 3] = np.packbits(unpacked, axis=1)
+
+    def _unpack_bytes(self, x1: int, x2: int, y1: int, y2: int) -> np.ndarray:
+        """Unpack every byte that holds part of the box, from bit `y1 & ~7` on."""
+        return np.unpackbits(self.bits[x1:x2, y1 >> 3 : (y2 + 7) >> 3], axis=1).view(bool)
+
+    @staticmethod
+    def _split(key: Any) -> Tuple[Any, Any]:
+        """Return the x and y parts of `key`, so `mask[:]` means the whole mask."""
+        if isinstance(key, tuple):
+            x, y = key
+            return x, y
+        return key, slice(None)
+
+    def _cell(self, x: int, y: int) -> Tuple[int, int]:
+        width, height = self.shape
+        if x < 0:
+            x += width
+        if y < 0:
+            y += height
+        if not (0 <= x < width and 0 <= y < height):
+            raise IndexError(f"({x}, {y}) is out of bounds for a mask of shape {self.shape}")
+        return x, y
+
+    def _box(self, x: Any, y: Any) -> Tuple[int, int, int, int]:
+        width, height = self.shape
+        if x is Ellipsis:
+            x = slice(None)
+        if y is Ellipsis:
+            y = slice(None)
+        if not isinstance(x, slice) or not isinstance(y, slice):
+            raise TypeError("BitMask boxes must be indexed with two slices")
+        x1, x2, x_step = x.indices(width)
+        y1, y2, y_step = y.indices(height)
+        if x_step != 1 or y_step != 1:
+            raise ValueError("BitMask slices must have a step of 1")
+        return x1, x2, y1, y2
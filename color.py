@@ -8,7 +8,10 @@ player_die = (0xFF, 0x30, 0x30)
 enemy_die = (0xFF, 0xA0, 0x30)
 
 welcome_text = (0x20, 0xA0, 0xFF)
+error_text = (0xFF, 0x40, 0x40)
 
 bar_text = white
 bar_filled = (0x0, 0x60, 0x0)
-bar_empty = (0x40, 0x10, 0x10)
\ No newline at end of file
+bar_empty = (0x40, 0x10, 0x10)
+
+timings_text = (0xA0, 0xA0, 0xA0)
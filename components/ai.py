@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from turtle import distance
+import time
 from typing import List, Tuple, TYPE_CHECKING
 
-import numpy as np  # type: ignore
 import tcod
 
 from actions import Action, MeleeAction, MovementAction, WaitAction
@@ -15,27 +15,30 @@ if TYPE_CHECKING:
 
 
 class BaseAI(Action, BaseComponent):
+    __slots__ = ()
+
     entity: Actor
 
     def perform(self) -> None:
         raise NotImplementedError()
 
+    @property
+    def dormant(self) -> bool:
+        """True if this AI only waits while its actor can't see the player.
+
+        Dormant actors outside the player's view don't take turns at all.
+        """
+        return False
+
     def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
         """Compute and return a path to the target position.
 
         If there is no valid path then returns an empty list.
         """
-        # Copy the walkable array.
-        cost = np.array(self.entity.game_map.tiles["walkable"], dtype=np.int8)
-
-        for entity in self.entity.game_map.entities:
-            # Check that an enitiy blocks movement and the cost isn't zero (blocking.)
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                # Add to the cost of a blocked position.
-                # A lower number means more enemies will crowd behind each other in
-                # hallways.  A higher number means enemies will take longer paths in
-                # order to surround the player.
-                cost[entity.x, entity.y] += 10
+        tracer = self.engine.tracer
+        start = time.perf_counter() if tracer is not None else 0.0
+        # The map keeps its cost array up to date, so it can be used directly.
+        cost = self.entity.game_map.movement_cost
 
         # Create a graph from the cost array and pass that graph to a new pathfinder.
         graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
@@ -46,14 +49,30 @@ class BaseAI(Action, BaseComponent):
         # Compute the path to the destination and remove the starting point.
         path: List[List[int]] = pathfinder.path_to((dest_x, dest_y))[1:].tolist()
 
+        if tracer is not None:
+            tracer.add_span(
+                "get_path_to",
+                "path",
+                start,
+                time.perf_counter(),
+                {"entity": self.entity.name, "x": self.entity.x, "y": self.entity.y, "length": len(path)},
+            )
+
         # Convert from List[List[int]] to List[Tuple[int, int]].
         return [(index[0], index[1]) for index in path]
     
 class HostileEnemy(BaseAI):
+    __slots__ = ("path",)
+
     def __init__(self, entity: Actor) -> None:
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
 
+    @property
+    def dormant(self) -> bool:
+        # Out of sight, only a path left from chasing the player moves it.
+        return not self.path
+
     def perform(self) -> None:
         target = self.engine.player
         dx = target.x - self.entity.x
@@ -64,7 +83,9 @@ class HostileEnemy(BaseAI):
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy).perform()
             
-            self.path = self.get_path_to(target.x, target.y)
+            # Follow the engine's shared path map instead of running a new
+            # search from every enemy that can see the player.
+            self.path = self.engine.get_path_to_player(self.entity.x, self.entity.y)
 
         if self.path:
             dest_x, dest_y = self.path.pop(0)
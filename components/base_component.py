@@ -11,6 +11,10 @@ if TYPE_CHECKING:
 
 
 class BaseComponent:
+    # Subclasses declare the `entity` slot themselves, so that BaseAI can
+    # also inherit it from Action without a layout conflict.
+    __slots__ = ()
+
     entity: Entity
 
     @property
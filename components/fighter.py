@@ -13,13 +13,16 @@ if TYPE_CHECKING:
 
 
 class Fighter(BaseComponent):
+    __slots__ = ("entity", "max_hp", "_hp", "_defense", "_power")
+
     entity: Actor
 
     def __init__(self, hp: int, defense: int, power: int):
+        # Not attached to an actor yet, so there's no actor table to update.
         self.max_hp = hp
-        self.hp = hp
-        self.defense = defense
-        self.power = power
+        self._hp = hp
+        self._defense = defense
+        self._power = power
 
 
     @property
@@ -29,9 +32,34 @@ class Fighter(BaseComponent):
     @hp.setter
     def hp(self, value: int) -> None:
         self._hp = max(0, min(value, self.max_hp))  # Clamp the value between 0 and max_hp
+        self._update_actor_table()
         if self._hp == 0 and self.entity.ai:
             self.die()
 
+    @property
+    def defense(self) -> int:
+        return self._defense
+
+    @defense.setter
+    def defense(self, value: int) -> None:
+        self._defense = value
+        self._update_actor_table()
+
+    @property
+    def power(self) -> int:
+        return self._power
+
+    @power.setter
+    def power(self, value: int) -> None:
+        self._power = value
+        self._update_actor_table()
+
+    def _update_actor_table(self) -> None:
+        """Copy these stats into the map's actor table, once there is one."""
+        game_map = getattr(getattr(self, "entity", None), "game_map", None)
+        if game_map is not None:
+            game_map.actor_table.update(self.entity)
+
 
     def die(self) -> None:
         if self.engine.player is self.entity:
@@ -48,5 +76,6 @@ class Fighter(BaseComponent):
         self.entity.ai = None
         self.entity.name = f"remains of {self.entity.name}"
         self.entity.render_order = RenderOrder.CORPSE
+        self.entity.game_map.update_entity(self.entity)
 
         self.engine.message_log.add_message(death_message, death_message_color)
\ No newline at end of file
@@ -1,51 +1,171 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Tuple
+import random
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 from tcod.console import Console
-from tcod.map import compute_fov
+import tcod.path
 
+import color
+from fov_cache import FovCache
+from frame_scheduler import FrameScheduler
 from input_handlers import MainGameEventHandler
 from message_log import MessageLog
-from render_functions import render_bar, render_names_at_mouse_location
+from render_functions import (
+    render_bar,
+    render_frame_timings,
+    render_names_at_mouse_location,
+    render_turn_profile,
+)
 
 if TYPE_CHECKING:
+    from floor_manager import FloorManager
     from game_map import GameMap
     from entity import Actor
     from input_handlers import EventHandler
+    from replay import ActionRecorder
+    from tracing import Tracer
+    from turn_profiler import TurnProfiler
 
 class Engine:
     game_map: GameMap
-    # Use the base EventHandler type for the attribute so different
-    # handler subclasses (e.g. MainGameEventHandler, GameOverEventHandler)
-    # can be assigned at runtime without causing type checker errors.
-    event_handler: "EventHandler"
+    floors: FloorManager
     mouse_location: Tuple[int, int]
 
-    def __init__(self, player: Actor):
+    def __init__(self, player: Actor, seed: Optional[int] = None):
+        if seed is None:
+            seed = random.randrange(2**32)
+        # Every random decision in a game is drawn from a floor's generator
+        # (see `floor_rng`), so the seed alone decides the game and a floor
+        # doesn't depend on what happened before it was reached.
+        self.seed = seed
+        # Number of turns the player has taken.
+        self.turn = 0
+        self.frame_scheduler = FrameScheduler(self)
         self.event_handler = MainGameEventHandler(self)
         self.player = player
         self.message_log = MessageLog()
         self.mouse_location = (0, 0)
+        self._player_pathfinder: Optional[tcod.path.Pathfinder] = None
+        # Fields of view by position, shared by anything that needs one.
+        self.fov_cache = FovCache()
+        # Receives every action the event handlers perform, when recording.
+        self.recorder: Optional[ActionRecorder] = None
+        # Times the phases of every turn when set.  None costs nothing.
+        self.profiler: Optional[TurnProfiler] = None
+        # Records a span for every piece of engine work when set.
+        self.tracer: Optional[Tracer] = None
+
+    # Use the base EventHandler type for the property so different
+    # handler subclasses (e.g. MainGameEventHandler, GameOverEventHandler)
+    # can be assigned at runtime without causing type checker errors.
+    @property
+    def event_handler(self) -> EventHandler:
+        return self._event_handler
+
+    @event_handler.setter
+    def event_handler(self, value: EventHandler) -> None:
+        # A different handler draws a different screen.
+        self._event_handler = value
+        self.frame_scheduler.request_redraw()
+
+    def floor_rng(self, depth: int) -> random.Random:
+        """Return a new random generator for the floor at `depth`.
+
+        The same game seed and depth always give the same sequence.
+        """
+        return random.Random(f"{self.seed}:floor:{depth}")
 
     def handle_enemy_turns(self) -> None:
-        # Iterate actors and skip the player explicitly. Using set difference
-        # caused type-checkers to complain (set[Actor] - {self.player}). This
-        # loop is equivalent at runtime and clearer to type checkers.
-        for entity in self.game_map.actors:
+        # The player has just acted, so any path map toward them is stale.
+        self._player_pathfinder = None
+        # Only actors near the player or awake take a turn, the others would
+        # just wait.  Iterate them and skip the player explicitly. Using set
+        # difference caused type-checkers to complain (set[Actor] - {self.player}).
+        if self.profiler is not None or self.tracer is not None:
+            return self._handle_enemy_turns_instrumented()
+        actor_table = self.game_map.actor_table
+        for entity in self.game_map.get_active_actors():
+            if entity is self.player:
+                continue
+            if entity.ai:
+                entity.ai.perform()
+                actor_table.update_awake(entity)
+
+    def _handle_enemy_turns_instrumented(self) -> None:
+        """Same as `handle_enemy_turns`, timing every AI for the profiler and tracer."""
+        profiler, tracer = self.profiler, self.tracer
+        ai_times: Dict[str, float] = {}
+        actor_table = self.game_map.actor_table
+        for entity in self.game_map.get_active_actors():
             if entity is self.player:
                 continue
             if entity.ai:
+                name = type(entity.ai).__name__
+                x, y = entity.x, entity.y
+                start = time.perf_counter()
                 entity.ai.perform()
+                end = time.perf_counter()
+                actor_table.update_awake(entity)
+                ai_times[name] = ai_times.get(name, 0.0) + end - start
+                if tracer is not None:
+                    tracer.add_span(
+                        f"{name}.perform", "ai", start, end, {"entity": entity.name, "x": x, "y": y}
+                    )
+        if profiler is not None:
+            for name, seconds in ai_times.items():
+                profiler.record(f"ai:{name}", seconds)
 
+    def get_path_to_player(self, x: int, y: int) -> List[Tuple[int, int]]:
+        """Return a path from the given position to the player.
+
+        Every chasing enemy shares one pathfinder rooted at the player, which
+        is built on first use and reused until the next enemy turn phase.
+        If there is no valid path then returns an empty list.
+        """
+        start = time.perf_counter() if self.tracer is not None else 0.0
+        if self._player_pathfinder is None:
+            graph = tcod.path.SimpleGraph(
+                cost=self.game_map.movement_cost, cardinal=2, diagonal=3
+            )
+            self._player_pathfinder = tcod.path.Pathfinder(graph)
+            self._player_pathfinder.add_root((self.player.x, self.player.y))
+
+        # Walk back toward the root and remove the starting point.
+        path: List[List[int]] = self._player_pathfinder.path_from((x, y))[1:].tolist()
+
+        if self.tracer is not None:
+            self.tracer.add_span(
+                "get_path_to_player", "path", start, time.perf_counter(), {"x": x, "y": y, "length": len(path)}
+            )
+        return [(index[0], index[1]) for index in path]
 
     def update_fov(self) -> None:
-        self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles["transparent"],
-            (self.player.x, self.player.y),
-            radius=8,
-        )
-        self.game_map.explored |= self.game_map.visible
+        """Recompute the visible area around the player.
+
+        Only the window the radius can reach is computed, and only the old
+        and new windows of `visible` and `explored` are touched, so the cost
+        doesn't grow with the size of the map.  Positions seen before are
+        served from `fov_cache`.
+        """
+        radius = 8
+        game_map = self.game_map
+
+        if game_map.fov_window is not None:
+            old_x1, old_y1, old_x2, old_y2 = game_map.fov_window
+            game_map.visible[old_x1:old_x2, old_y1:old_y2] = False
+            game_map.mark_dirty(*game_map.fov_window)
+
+        window, visible = self.fov_cache.compute(game_map, self.player.x, self.player.y, radius)
+        x1, y1, x2, y2 = window
+        game_map.visible[x1:x2, y1:y2] = visible
+        game_map.explored[x1:x2, y1:y2] |= visible
+
+        # Only cells within the radius of the old and new positions can have
+        # changed, so only those need to be redrawn.
+        game_map.fov_window = window
+        game_map.mark_dirty(*game_map.fov_window)
 
     def render(self, console: Console) -> None:
         self.game_map.render(console)
@@ -59,4 +179,17 @@ class Engine:
             total_width=20,
         )
 
-        render_names_at_mouse_location(console, 21, 44, self)
\ No newline at end of file
+        render_names_at_mouse_location(console, 21, 44, self)
+
+        if self.frame_scheduler.show_timings:
+            render_frame_timings(console, 61, 45, self.frame_scheduler.averages())
+
+        if self.profiler is not None and self.profiler.show_overlay:
+            render_turn_profile(console, 44, 0, self.profiler.summary())
+
+    def render_mouse_hover(self, console: Console) -> None:
+        """Redraw only the names under the mouse, over the last frame."""
+        console.draw_rect(
+            x=21, y=44, width=console.width - 21, height=1, ch=ord(" "), bg=color.black
+        )
+        render_names_at_mouse_location(console, 21, 44, self)
@@ -1,8 +1,7 @@
 from __future__ import annotations
 
-import copy
 from typing import Tuple
-from typing import Tuple, TypeVar, TYPE_CHECKING, Optional, Type
+from typing import Tuple, TYPE_CHECKING, Optional, Type
 
 from render_order import RenderOrder
 
@@ -11,14 +10,23 @@ if TYPE_CHECKING:
     from components.ai import BaseAI
     from components.fighter import Fighter
 
-T = TypeVar("T", bound="Entity")
-
 
 class Entity:
     """
     A generic object to represent players, enemies, items, etc.
     """
 
+    __slots__ = (
+        "x",
+        "y",
+        "char",
+        "color",
+        "name",
+        "blocks_movement",
+        "render_order",
+        "game_map",
+    )
+
     game_map: GameMap
 
     def __init__(
@@ -41,35 +49,33 @@ class Entity:
         self.render_order = render_order
         if game_map:
             self.game_map = game_map
-            game_map.entities.add(self)
-
-    def spawn(self: T, game_map: GameMap, x: int, y: int) -> T:
-        """Spawn a copy of this instance at the given location."""
-        clone = copy.deepcopy(self)
-        clone.x = x
-        clone.y = y
-        clone.game_map = game_map
-        game_map.entities.add(clone)
-        return clone
-    
+            game_map.add_entity(self)
 
     def place(self, x: int, y: int, game_map: Optional[GameMap] = None) -> None:
         """Place this entity at a new location. Handles moving across game maps."""
-        self.x = x
-        self.y = y
         if game_map:
-            if hasattr(self, "game_map"):
-                self.game_map.entities.remove(self)
+            if hasattr(self, "game_map"):  # Possibly uninitialized.
+                self.game_map.remove_entity(self)
+            self.x = x
+            self.y = y
             self.game_map = game_map
-            game_map.entities.add(self)
+            game_map.add_entity(self)
+        else:
+            self.x = x
+            self.y = y
+            if hasattr(self, "game_map"):
+                self.game_map.update_entity(self)
 
     
     def move(self, dx: int, dy: int) -> None:
         self.x += dx
         self.y += dy
+        self.game_map.update_entity(self)
 
 
 class Actor(Entity):
+    __slots__ = ("ai", "fighter")
+
     def __init__(
         self,
         *,
@@ -1,27 +1,98 @@
+from __future__ import annotations
+
+from typing import Iterable, List, Tuple, Type, TYPE_CHECKING
+
 from entity import Actor
-from components.ai import HostileEnemy
+from components.ai import BaseAI, HostileEnemy
 from components.fighter import Fighter
 
-player = Actor(
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+
+class ActorTemplate:
+    """A compact description of an actor, used to build new instances of it.
+
+    Each instance gets freshly constructed components, which is much cheaper
+    than deep-copying an existing actor.
+    """
+
+    def __init__(
+        self,
+        *,
+        char: str,
+        color: Tuple[int, int, int],
+        name: str,
+        ai_cls: Type[BaseAI],
+        hp: int,
+        defense: int,
+        power: int,
+    ):
+        self.char = char
+        self.color = color
+        self.name = name
+        self.ai_cls = ai_cls
+        self.hp = hp
+        self.defense = defense
+        self.power = power
+
+    def build(self, x: int = 0, y: int = 0) -> Actor:
+        """Return a new actor from this template, not placed on any map."""
+        return Actor(
+            x=x,
+            y=y,
+            char=self.char,
+            color=self.color,
+            name=self.name,
+            ai_cls=self.ai_cls,
+            fighter=Fighter(hp=self.hp, defense=self.defense, power=self.power),
+        )
+
+    def spawn(self, game_map: GameMap, x: int, y: int) -> Actor:
+        """Spawn a new actor from this template at the given location."""
+        actor = self.build(x, y)
+        actor.game_map = game_map
+        game_map.add_entity(actor)
+        return actor
+
+    def spawn_many(self, game_map: GameMap, positions: Iterable[Tuple[int, int]]) -> List[Actor]:
+        """Spawn a new actor from this template at each of the given locations.
+
+        The actors are added to the map in one batch, see `GameMap.add_entities`.
+        """
+        actors = [self.build(x, y) for x, y in positions]
+        for actor in actors:
+            actor.game_map = game_map
+        game_map.add_entities(actors)
+        return actors
+
+
+player = ActorTemplate(
     char="@",
     color=(255, 255, 255),
     name="Player",
-    fighter=Fighter(hp=30, defense=2, power=5),
     ai_cls=HostileEnemy,
+    hp=30,
+    defense=2,
+    power=5,
 )
 
-orc = Actor(
+orc = ActorTemplate(
     char="o",
     color=(63, 127, 63),
     name="Orc",
-    fighter=Fighter(hp=10, defense=0, power=3),
     ai_cls=HostileEnemy,
+    hp=10,
+    defense=0,
+    power=3,
 )
 
-troll = Actor(
+troll = ActorTemplate(
     char="T",
     color=(0, 127, 0),
     name="Troll",
-    fighter=Fighter(hp=16, defense=1, power=4),
     ai_cls=HostileEnemy,
-)
\ No newline at end of file
+    hp=16,
+    defense=1,
+    power=4,
+)
@@ -0,0 +1,115 @@
+"""Keep every floor of a game, with only the recently visited ones in memory."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional, Tuple
+
+from floor_service import build_floor
+from map_records import compress_map, decompress_map
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from floor_service import FloorService
+    from game_map import GameMap
+
+
+class FloorManager:
+    """Move the player between floors and store the floors they left.
+
+    The active floor is always `engine.game_map`.  The `live_floors` floors
+    left most recently are kept as they are, so going back to them is
+    instant.  Older floors are stored compressed, as their tiles, explored
+    mask and entity records (see `map_records`), and rebuilt on a revisit.
+    Inactive floors never change, so each is compressed once, when it is
+    left, and saving a game reuses that.
+
+    New floors are generated from `floor_params` and the engine's seed, by
+    `service` in the background if one is given.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        floor_params: Mapping[str, Any],
+        live_floors: int = 4,
+        service: Optional[FloorService] = None,
+        compression_level: int = 6,
+    ):
+        self.engine = engine
+        self.floor_params = dict(floor_params)
+        self.live_floors = live_floors
+        self.service = service
+        self.compression_level = compression_level
+        # The depth of `engine.game_map`.
+        self.depth = 1
+        # Inactive floors by depth, least recently left first.
+        self.live: OrderedDict[int, GameMap] = OrderedDict()
+        self.compressed: Dict[int, bytes] = {}
+        # The compressed form of each floor in `live`, for saving.
+        self.live_compressed: Dict[int, bytes] = {}
+        # Where the player stood when they last left each inactive floor.
+        self.exits: Dict[int, Tuple[int, int]] = {}
+
+    @property
+    def compressed_size(self) -> int:
+        """Total size in bytes of the compressed floors."""
+        return sum(len(data) for data in self.compressed.values())
+
+    def visited(self, depth: int) -> bool:
+        """Return True if the floor at `depth` exists already."""
+        return depth == self.depth or depth in self.live or depth in self.compressed
+
+    def descend(self) -> GameMap:
+        return self.go_to(self.depth + 1)
+
+    def ascend(self) -> GameMap:
+        return self.go_to(self.depth - 1)
+
+    def go_to(self, depth: int) -> GameMap:
+        """Make the floor at `depth` active and return it.
+
+        A floor visited before is restored as it was left, with the player
+        back where they left it.  Any other floor is generated.
+        """
+        if depth < 1:
+            raise ValueError(f"There is no floor at depth {depth}.")
+        if depth == self.depth:
+            return self.engine.game_map
+
+        player = self.engine.player
+        old_depth, old_map = self.depth, self.engine.game_map
+        self.exits[old_depth] = player.x, player.y
+
+        if depth in self.live:
+            del self.live_compressed[depth]
+            self._enter(self.live.pop(depth), self.exits.pop(depth))
+        elif depth in self.compressed:
+            self._enter(self._decompress(depth), self.exits.pop(depth))
+        elif self.service is not None:
+            self.service.descend(depth)
+        else:
+            self._enter(*build_floor(self.engine.seed, depth, self.floor_params))
+        self.depth = depth
+
+        # The player has left the old floor by now, so it can be stored.
+        self.live[old_depth] = old_map
+        self.live_compressed[old_depth] = self.compress(old_map)
+        while len(self.live) > self.live_floors:
+            self._evict(self.live.popitem(last=False)[0])
+        return self.engine.game_map
+
+    def _enter(self, game_map: GameMap, start: Tuple[int, int]) -> None:
+        game_map.engine = self.engine
+        self.engine.player.place(*start, game_map)
+        self.engine.game_map = game_map
+        self.engine.update_fov()
+
+    def compress(self, game_map: GameMap) -> bytes:
+        """Return `game_map` in the form inactive floors are stored in."""
+        return compress_map(game_map, self.compression_level)
+
+    def _evict(self, depth: int) -> None:
+        self.compressed[depth] = self.live_compressed.pop(depth)
+
+    def _decompress(self, depth: int) -> GameMap:
+        return decompress_map(self.compressed.pop(depth))
@@ -0,0 +1,103 @@
+"""Generate upcoming floors in background processes while the player is busy."""
+from __future__ import annotations
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from engine import Engine
+import entity_factories
+from game_map import GameMap
+from procgen import generate_dungeon
+
+FloorResult = Tuple[GameMap, Tuple[int, int]]
+
+
+def build_floor(seed: int, depth: int, floor_params: Mapping[str, Any]) -> FloorResult:
+    """Generate the floor at `depth` for the game with `seed`.
+
+    This runs in a worker process, so it uses a stand-in engine and player.
+    The map is returned without them, together with the player's start position.
+    """
+    engine = Engine(player=entity_factories.player.build(), seed=seed)
+    game_map = generate_dungeon(engine=engine, rng=engine.floor_rng(depth), **floor_params)
+
+    start = engine.player.x, engine.player.y
+    game_map.remove_entity(engine.player)
+    return game_map, start
+
+
+class FloorService:
+    """Build the next few floors in a process pool ahead of time.
+
+    `floor_params` are the keyword arguments passed on to `generate_dungeon`.
+    Floors are generated from the engine's seed, so a pre-generated floor is
+    identical to one generated on the spot.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        floor_params: Mapping[str, Any],
+        lookahead: int = 2,
+        max_workers: Optional[int] = None,
+    ):
+        self.engine = engine
+        self.floor_params = dict(floor_params)
+        self.lookahead = lookahead
+        self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        self.pending: Dict[int, Future[FloorResult]] = {}
+
+    def prefetch(self, depth: int) -> None:
+        """Start generating the floors from `depth` up to the lookahead limit."""
+        for next_depth in range(depth, depth + self.lookahead):
+            if next_depth not in self.pending:
+                self.pending[next_depth] = self.executor.submit(
+                    build_floor, self.engine.seed, next_depth, self.floor_params
+                )
+
+    def is_ready(self, depth: int) -> bool:
+        """Return True if the floor at `depth` has finished generating."""
+        future = self.pending.get(depth)
+        return future is not None and future.done()
+
+    def descend(self, depth: int) -> GameMap:
+        """Make the floor at `depth` the engine's active map and return it.
+
+        A floor that is still generating is waited on, and one that was never
+        requested is generated in this process.  Floors prefetched above it
+        are dropped, and generation of the floors after it is started before
+        returning.
+        """
+        future = self.pending.pop(depth, None)
+        # Floors are only generated once, on the way down, so those above
+        # are never asked for again.
+        for stale_depth in [pending_depth for pending_depth in self.pending if pending_depth < depth]:
+            self.pending.pop(stale_depth).cancel()
+        if future is None:
+            game_map, start = build_floor(self.engine.seed, depth, self.floor_params)
+        else:
+            game_map, start = future.result()
+
+        game_map.engine = self.engine
+        self.engine.player.place(*start, game_map)
+        self.engine.game_map = game_map
+        self.engine.update_fov()
+
+        self.prefetch(depth + 1)
+        return game_map
+
+    def close(self) -> None:
+        """Cancel floors that haven't started and shut down the workers.
+
+        Floors that are already being generated are waited on.
+        """
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.executor.shutdown()
+
+    def __enter__(self) -> FloorService:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
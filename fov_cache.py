@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Tuple
+import weakref
+
+import numpy as np  # type: ignore
+from tcod.map import compute_fov
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+# An x1, y1, x2, y2 box on a map, exclusive.
+Window = Tuple[int, int, int, int]
+
+
+class FovCache:
+    """Least recently used cache of fields of view on one map.
+
+    Each result is the window around the viewer that the radius can reach,
+    stored as a packed bitmask.  Everything cached is dropped when the map
+    changes or its `version` moves on, so walls that were opened or closed
+    are always seen.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # (x, y, radius) -> (window, packed visible mask), least recently
+        # used first.
+        self._entries: OrderedDict[Tuple[int, int, int], Tuple[Window, np.ndarray]] = OrderedDict()
+        self._game_map: Optional[weakref.ReferenceType[GameMap]] = None
+        self._version = -1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def compute(self, game_map: GameMap, x: int, y: int, radius: int) -> Tuple[Window, np.ndarray]:
+        """Return the window around (x, y) and which of its cells are visible from there.
+
+        The mask is a new array that the caller may keep or modify.
+        """
+        if self._game_map is None or self._game_map() is not game_map or self._version != game_map.version:
+            self.clear()
+            self._game_map = weakref.ref(game_map)
+            self._version = game_map.version
+
+        key = (x, y, radius)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            window, packed = entry
+            x1, y1, x2, y2 = window
+            shape = x2 - x1, y2 - y1
+            visible = np.unpackbits(packed, count=shape[0] * shape[1]).reshape(shape).view(np.bool_)
+            return window, visible
+
+        self.misses += 1
+        x1, y1 = max(x - radius, 0), max(y - radius, 0)
+        x2, y2 = min(x + radius + 1, game_map.width), min(y + radius + 1, game_map.height)
+        window = (x1, y1, x2, y2)
+        visible = compute_fov(
+            game_map.transparent[x1:x2, y1:y2], (x - x1, y - y1), radius=radius
+        )
+        self._entries[key] = (window, np.packbits(visible))
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return window, visible
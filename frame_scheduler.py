@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from collections import deque
+import time
+from typing import TYPE_CHECKING, Deque, Dict, NamedTuple
+
+import tcod.event
+
+if TYPE_CHECKING:
+    import tcod.context
+    from tcod.console import Console
+    from engine import Engine
+
+
+class FrameTiming(NamedTuple):
+    """How long each part of one frame took, in milliseconds."""
+
+    kind: str  # "full", "hover" or "idle" (nothing was redrawn).
+    render: float
+    present: float
+    events: float
+
+
+class FrameScheduler:
+    """Redraw the screen only when something asked for it, and time every frame.
+
+    Event handlers call `request_redraw` when the game state or the active
+    handler changes, and `request_hover_redraw` when only the mouse moved.
+    """
+
+    def __init__(self, engine: Engine, history: int = 300):
+        self.engine = engine
+        self.redraw = True
+        self.redraw_hover = False
+        # Whether the frame timing overlay is drawn.
+        self.show_timings = False
+        self.timings: Deque[FrameTiming] = deque(maxlen=history)
+        self._kind = "idle"
+        self._render_time = 0.0
+        self._present_time = 0.0
+
+    def request_redraw(self) -> None:
+        self.redraw = True
+
+    def request_hover_redraw(self) -> None:
+        self.redraw_hover = True
+
+    def draw(self, console: Console, context: tcod.context.Context) -> None:
+        """Render and present a frame, if one was requested."""
+        if not (self.redraw or self.redraw_hover):
+            self._kind = "idle"
+            self._render_time = self._present_time = 0.0
+            return
+
+        start = time.perf_counter()
+        handler = self.engine.event_handler
+        # Only the hover text changed, so draw it over the last frame if the
+        # active handler supports that.
+        if not self.redraw and handler.on_render_mouse_hover(console):
+            self._kind = "hover"
+        else:
+            self._kind = "full"
+            console.clear()
+            handler.on_render(console=console)
+        self.redraw = self.redraw_hover = False
+
+        rendered = time.perf_counter()
+        context.present(console)
+        presented = time.perf_counter()
+
+        self._render_time = (rendered - start) * 1000
+        if self.engine.profiler is not None and self._kind == "full":
+            self.engine.profiler.record("render", rendered - start)
+        if self.engine.tracer is not None:
+            self.engine.tracer.add_span("render", "render", start, rendered, {"kind": self._kind})
+            self.engine.tracer.add_span("present", "render", rendered, presented)
+        self._present_time = (presented - rendered) * 1000
+
+    def handle_events(self, context: tcod.context.Context) -> None:
+        """Wait for events, handle them, and record the timings of this frame.
+
+        Time spent waiting for input isn't counted.
+        """
+        events = tcod.event.wait()
+        start = time.perf_counter()
+        self.engine.event_handler.handle_events(context, events)
+        events_time = (time.perf_counter() - start) * 1000
+
+        self.timings.append(
+            FrameTiming(self._kind, self._render_time, self._present_time, events_time)
+        )
+
+    def averages(self) -> Dict[str, float]:
+        """Return mean timings over the recorded frames.
+
+        Render and present times are averaged over the frames that were
+        actually redrawn, event times over every frame.
+        """
+        drawn = [timing for timing in self.timings if timing.kind != "idle"]
+        return {
+            "render": sum(frame.render for frame in drawn) / max(len(drawn), 1),
+            "present": sum(frame.present for frame in drawn) / max(len(drawn), 1),
+            "events": sum(frame.events for frame in self.timings) / max(len(self.timings), 1),
+            "frames": len(self.timings),
+            "redrawn": len(drawn),
+        }
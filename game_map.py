@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 from html import entities
-from typing import TYPE_CHECKING, Iterable, Optional, Iterator
+from typing import TYPE_CHECKING, Any, Collection, Dict, Iterable, KeysView, List, Optional, Iterator, Sequence, Set, Tuple
 
 import numpy as np  # type: ignore
 from tcod.console import Console
 
+from actor_table import ActorTable
+from bit_mask import BitMask
 from entity import Actor
+from render_order import RenderOrder
+from sprite_table import SpriteTable
 import tile_types
 
 if TYPE_CHECKING:
@@ -14,19 +18,101 @@ if TYPE_CHECKING:
     from entity import Entity
 
 
+# Extra pathfinding cost of a cell holding a blocking entity.
+# A lower number means more enemies will crowd behind each other in
+# hallways.  A higher number means enemies will take longer paths in
+# order to surround the player.
+BLOCKING_ENTITY_COST = 10
+MAX_MOVEMENT_COST = int(np.iinfo(np.int8).max)
+
+# Render orders from the bottom layer to the top.
+RENDER_ORDERS = sorted(RenderOrder, key=lambda order: order.value)
+
+
 class GameMap:
     def __init__(self, engine: Engine, width: int, height: int, entities: Iterable[Entity] = ()):
         self.engine = engine
         self.width, self.height = width, height
-        self.entities = set(entities)
-        self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
+        # The id of each cell's tile in `palette`.
+        self.tile_ids = np.full((width, height), fill_value=tile_types.wall_id, dtype=np.uint8, order="F")
+        self.palette = tile_types.palette
+        # Properties of each cell's tile, kept in step with `tile_ids`.
+        self.walkable = np.full((width, height), self.palette["walkable"][tile_types.wall_id], order="F")
+        self.transparent = np.full((width, height), self.palette["transparent"][tile_types.wall_id], order="F")
+        # Incremented on every change to the tiles, so results derived from
+        # them can tell when they are stale.
+        self.version = 0
 
-        self.visible = np.full(
-            (width, height), fill_value=False, order="F"
-        )
-        self.explored = np.full(
-            (width, height), fill_value=False, order="F"
-        )
+        # One bit per cell, since every floor ever visited keeps these.
+        self.visible = BitMask(width, height)
+        self.explored = BitMask(width, height)
+        # The x1, y1, x2, y2 box (exclusive) outside of which `visible` is
+        # all False, set by the engine's FOV updates.
+        self.fov_window: Optional[Tuple[int, int, int, int]] = None
+
+        # The map layer as last drawn, rebuilt only inside `_dirty` (an
+        # x1, y1, x2, y2 box, exclusive) whenever tiles, visible or explored
+        # change.
+        self._graphics = np.zeros((width, height), dtype=tile_types.graphic_dt, order="F")
+        self._dirty: Optional[Tuple[int, int, int, int]] = (0, 0, width, height)
+
+        # Number of blocking entities standing on each cell.
+        self.occupancy = np.zeros((width, height), dtype=np.uint8, order="F")
+        # Pathfinding cost of each cell, kept in step with `tiles` and
+        # `occupancy`.  Zero means the cell can't be entered.
+        self.movement_cost = np.zeros((width, height), dtype=np.int8, order="F")
+
+        # Spatial hash of entities keyed by their (x, y) cell, so that lookups
+        # by position don't have to scan every entity on the map.  Each bucket
+        # is a dict used as an insertion-ordered set.
+        self._entities_by_location: Dict[Tuple[int, int], Dict[Entity, None]] = {}
+        # The cell each entity is currently indexed under.  Dicts keep their
+        # insertion order, which makes this the ordered list of entities.
+        self._entity_locations: Dict[Entity, Tuple[int, int]] = {}
+        # Entities currently counted in `occupancy`.
+        self._blocking_entities: Set[Entity] = set()
+        # Positions and stats of every actor, as arrays.
+        self.actor_table = ActorTable()
+        # Entities bucketed by render order, so drawing doesn't need to sort.
+        self._sprite_tables = {order: SpriteTable() for order in RenderOrder}
+        self._render_orders: Dict[Entity, RenderOrder] = {}
+        for entity in entities:
+            self.add_entity(entity)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the tiles, explored mask and entities of this map.
+
+        Everything else is rebuilt from those when unpickling.  The engine
+        isn't pickled, whoever unpickles the map must set `engine` before
+        using it.
+        """
+        return {
+            "width": self.width,
+            "height": self.height,
+            "palette": self.palette,
+            "tile_ids": self.tile_ids,
+            "version": self.version,
+            "explored": self.explored,
+            "entities": list(self.entities),
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        GameMap.__init__(self, None, state["width"], state["height"])  # type: ignore[arg-type]
+        self.palette = state["palette"]
+        self.tile_ids = state["tile_ids"]
+        self.refresh_tiles()
+        self.version = state["version"]
+        self.explored = state["explored"]
+        for entity in state["entities"]:
+            self.add_entity(entity)
+
+    @property
+    def entities(self) -> KeysView[Entity]:
+        """All entities on this map, in the order they were added.
+
+        The order is stable from run to run, so turn order is reproducible.
+        """
+        return self._entity_locations.keys()
 
     @property
     def actors(self) -> Iterator[Actor]:
@@ -36,47 +122,238 @@ class GameMap:
             if isinstance(entity, Actor) and entity.is_alive
         )
 
+    @property
+    def tiles(self) -> np.ndarray:
+        """A read-only `tile_dt` array of this map's tiles.
+
+        This is built on every access, prefer `tile_ids`, `walkable` and
+        `transparent`.  To change tiles use `set_tiles`, or write `tile_ids`
+        and call `refresh_tiles`.
+        """
+        tiles = self.palette[self.tile_ids]
+        # Writes to this copy would be lost, so make them fail instead.
+        tiles.flags.writeable = False
+        return tiles
+
+    def set_tiles(self, index: Any, tile_id: Any) -> None:
+        """Set the tiles at `index` to `tile_id` and refresh what depends on them.
+
+        All changes to the tiles should go through here.
+        """
+        self.tile_ids[index] = tile_id
+        self.refresh_tiles(index)
+
+    def refresh_tiles(self, index: Any = ...) -> None:
+        """Refresh what depends on `tile_ids[index]` after it was written directly."""
+        tile_ids = self.tile_ids[index]
+        self.walkable[index] = np.take(self.palette["walkable"], tile_ids)
+        self.transparent[index] = np.take(self.palette["transparent"], tile_ids)
+        self.version += 1
+        self._refresh_movement_cost(index)
+        box = self._index_box(index)
+        if box is not None:
+            self.mark_dirty(*box)
+
+    def _index_box(self, index: Any) -> Optional[Tuple[int, int, int, int]]:
+        """Return the x1, y1, x2, y2 box (exclusive) around the cells `index`
+        selects, or None if it selects none."""
+        if isinstance(index, np.ndarray) and index.dtype == np.bool_ and index.ndim == 2:
+            xs, ys = np.nonzero(index)
+        else:
+            if not isinstance(index, tuple):
+                index = (index,)
+            if len(index) > 2 or any(axis is ... for axis in index):
+                return 0, 0, self.width, self.height
+            index += (slice(None),) * (2 - len(index))
+            # Index each axis on its own, which works for ints, slices and
+            # integer or boolean arrays alike.
+            xs = np.arange(self.width)[index[0]]
+            ys = np.arange(self.height)[index[1]]
+        xs, ys = np.asarray(xs), np.asarray(ys)
+        if xs.size == 0 or ys.size == 0:
+            return None
+        return int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1
+
+    def mark_dirty(self, x1: int, y1: int, x2: int, y2: int) -> None:
+        """Mark a box of the map layer to be redrawn on the next render.
+
+        Must be called after changing `visible` or `explored` directly.
+        Tiles are changed by writing `tile_ids` and then calling
+        `refresh_tiles`, which marks them.  `x2` and `y2` are exclusive.
+        """
+        x1, y1 = max(x1, 0), max(y1, 0)
+        x2, y2 = min(x2, self.width), min(y2, self.height)
+        if self._dirty is not None:
+            x1, y1 = min(x1, self._dirty[0]), min(y1, self._dirty[1])
+            x2, y2 = max(x2, self._dirty[2]), max(y2, self._dirty[3])
+        self._dirty = (x1, y1, x2, y2)
+
+    def add_entity(self, entity: Entity) -> None:
+        """Add an entity to this map and index it at its current location."""
+        self.update_entity(entity)
+
+    def add_entities(self, entities: Sequence[Entity]) -> None:
+        """Add many entities to this map at once.
+
+        Same as calling `add_entity` on each of them in order, but the
+        actor, sprite and occupancy arrays are each updated in one pass.
+        None of the entities may be on this map already.
+        """
+        actors: List[Actor] = []
+        by_order: Dict[RenderOrder, List[Entity]] = {}
+        blocking_x: List[int] = []
+        blocking_y: List[int] = []
+        for entity in entities:
+            if entity in self._entity_locations:
+                raise ValueError(f"{entity!r} is already on this map.")
+            location = (entity.x, entity.y)
+            self._entity_locations[entity] = location
+            self._entities_by_location.setdefault(location, {})[entity] = None
+            self._render_orders[entity] = entity.render_order
+            by_order.setdefault(entity.render_order, []).append(entity)
+            if isinstance(entity, Actor):
+                actors.append(entity)
+            if entity.blocks_movement:
+                self._blocking_entities.add(entity)
+                blocking_x.append(entity.x)
+                blocking_y.append(entity.y)
+
+        self.actor_table.add_many(actors)
+        for order, bucket in by_order.items():
+            self._sprite_tables[order].add_many(bucket)
+        if blocking_x:
+            index = (np.array(blocking_x, dtype=np.intp), np.array(blocking_y, dtype=np.intp))
+            np.add.at(self.occupancy, index, 1)
+            self._refresh_movement_cost(index)
+
+    def remove_entity(self, entity: Entity) -> None:
+        """Remove an entity from this map and from the location index."""
+        location = self._entity_locations.pop(entity)
+        self._discard_from_location(entity, location)
+        if entity in self._blocking_entities:
+            self._blocking_entities.remove(entity)
+            self._change_occupancy(location, -1)
+        if isinstance(entity, Actor):
+            self.actor_table.remove(entity)
+        self._sprite_tables[self._render_orders.pop(entity)].remove(entity)
+
+    def update_entity(self, entity: Entity) -> None:
+        """Re-index an entity after its position, look or `blocks_movement` changed.
+
+        The look is its `char`, `color` and `render_order`.
+        """
+        location = (entity.x, entity.y)
+        old_location = self._entity_locations.get(entity)
+        if old_location != location:
+            if old_location is not None:
+                self._discard_from_location(entity, old_location)
+            self._entity_locations[entity] = location
+            self._entities_by_location.setdefault(location, {})[entity] = None
+
+        if isinstance(entity, Actor):
+            self.actor_table.update(entity)
+
+        old_order = self._render_orders.get(entity)
+        if old_order is not entity.render_order:
+            if old_order is not None:
+                self._sprite_tables[old_order].remove(entity)
+            self._render_orders[entity] = entity.render_order
+        self._sprite_tables[entity.render_order].update(entity)
+
+        if entity in self._blocking_entities:
+            if entity.blocks_movement and old_location == location:
+                return
+            self._blocking_entities.remove(entity)
+            self._change_occupancy(old_location, -1)
+        if entity.blocks_movement:
+            self._blocking_entities.add(entity)
+            self._change_occupancy(location, 1)
+
+    def _discard_from_location(self, entity: Entity, location: Tuple[int, int]) -> None:
+        bucket = self._entities_by_location[location]
+        del bucket[entity]
+        if not bucket:
+            del self._entities_by_location[location]
+
+    def _change_occupancy(self, location: Tuple[int, int], delta: int) -> None:
+        occupancy = int(self.occupancy[location]) + delta
+        self.occupancy[location] = occupancy
+        # A single cell is updated with plain ints, which is much cheaper than
+        # going through the array version in `_refresh_movement_cost`.
+        if self.walkable[location]:
+            self.movement_cost[location] = min(1 + BLOCKING_ENTITY_COST * occupancy, MAX_MOVEMENT_COST)
+
+    def _refresh_movement_cost(self, index: Any) -> None:
+        walkable = self.walkable[index]
+        cost = 1 + BLOCKING_ENTITY_COST * self.occupancy[index].astype(np.int16)
+        self.movement_cost[index] = np.where(
+            walkable, np.minimum(cost, MAX_MOVEMENT_COST), 0
+        )
+
+    def get_entities_at_location(self, x: int, y: int) -> Collection[Entity]:
+        """Return all entities at the given location."""
+        bucket = self._entities_by_location.get((x, y))
+        return bucket.keys() if bucket else ()
+
     def get_blocking_entity_at_location(
         self, location_x: int, location_y: int
     ) -> Optional[Entity]:
-        for entity in self.entities:
-            if (
-                entity.blocks_movement
-                and entity.x == location_x
-                and entity.y == location_y
-            ):
+        for entity in self.get_entities_at_location(location_x, location_y):
+            if entity.blocks_movement:
                 return entity
 
         return None
     
 
     def get_actor_at_location(self, x: int, y: int) -> Optional[Actor]:
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor
+        for entity in self.get_entities_at_location(x, y):
+            if isinstance(entity, Actor) and entity.is_alive:
+                return entity
         return None
+
+    def get_actors_in_radius(self, x: int, y: int, radius: int) -> List[Actor]:
+        """Return the living actors within `radius` tiles of (x, y)."""
+        return self.actor_table.actors_in_radius(x, y, radius)
     
     
+    def get_active_actors(self) -> List[Actor]:
+        """Return the living actors that may act this turn, in turn order.
+
+        Those are the actors inside `fov_window`, which can be seen by the
+        player, and the ones whose AI is awake.  Dormant actors elsewhere
+        would only wait, so the cost of the enemy turns follows the number
+        of actors near the player instead of the number on the floor.
+        """
+        if self.fov_window is None:
+            return self.actor_table.active_actors(0, 0, 0, 0)
+        return self.actor_table.active_actors(*self.fov_window)
+
     def in_bounds(self, x: int, y: int) -> bool:
         """Return True if x and y are inside of the bounds of this map."""
         return 0 <= x < self.width and 0 <= y < self.height
 
-    def render(self, console: Console) -> None:
-        console.rgb[0 : self.width, 0 : self.height] = np.select(
-            condlist=[self.visible, self.explored],
+    def _update_graphics(self) -> None:
+        """Rebuild the cached map layer inside the dirty box."""
+        if self._dirty is None:
+            return
+        x1, y1, x2, y2 = self._dirty
+        self._dirty = None
+        if x1 >= x2 or y1 >= y2:
+            return
+        box = slice(x1, x2), slice(y1, y2)
+        tile_ids = self.tile_ids[box]
+        self._graphics[box] = np.select(
+            condlist=[self.visible[box], self.explored[box]],
             choicelist=[
-                self.tiles["light"],
-                self.tiles["dark"],
+                self.palette["light"][tile_ids],
+                self.palette["dark"][tile_ids],
             ],
             default=tile_types.SHROUD,
         )
 
-        entities_sorted_for_rendering = sorted(
-            self.entities, key=lambda x: x.render_order.value
-        )
+    def render(self, console: Console) -> None:
+        self._update_graphics()
+        console.rgb[0 : self.width, 0 : self.height] = self._graphics
 
-        for entity in entities_sorted_for_rendering:
-            if self.visible[entity.x, entity.y]:
-                console.print(
-                    x=entity.x, y=entity.y, text=entity.char, fg=entity.color
-                )
\ No newline at end of file
+        for order in RENDER_ORDERS:
+            self._sprite_tables[order].draw(console, self.visible)
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""Drive an Engine without a window, for soak tests, bots and benchmarks.
+
+Run a random-walk soak from the command line with:
+
+    python headless.py --turns 10000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Iterable, Optional, Union
+
+import tcod.console
+import tcod.event
+
+from actions import Action, BumpAction
+from engine import Engine
+from input_handlers import MOVE_KEYS, MainGameEventHandler
+import setup_game
+from tracing import Tracer
+from turn_profiler import TurnProfiler
+
+ScriptedInput = Union[Action, tcod.event.Event]
+
+
+def key_event(sym: tcod.event.KeySym) -> tcod.event.KeyDown:
+    """Return a KeyDown event for `sym`, as if the key had been pressed."""
+    return tcod.event.KeyDown(
+        scancode=tcod.event.Scancode.UNKNOWN, sym=sym, mod=tcod.event.Modifier.NONE
+    )
+
+
+class HeadlessDriver:
+    """Step an Engine programmatically with no window or tileset.
+
+    Inputs go to whichever event handler is active on the engine, the same
+    way the main loop would route them.  Actions are only performed while
+    the main game handler is active, so nothing moves once the player is
+    dead.  If `console` is given then the active handler renders to it
+    after every input, otherwise rendering is skipped.
+    """
+
+    def __init__(self, engine: Engine, console: Optional[tcod.console.Console] = None):
+        self.engine = engine
+        self.console = console
+        self.turns = 0
+
+    def perform(self, action: Action) -> bool:
+        """Handle `action` as if an event had produced it.
+
+        Returns True if the action advanced a turn.  The action is ignored
+        unless the main game handler is active.
+        """
+        if not isinstance(self.engine.event_handler, MainGameEventHandler):
+            return False
+        return self._step(action)
+
+    def send(self, event: tcod.event.Event) -> bool:
+        """Dispatch `event` to the active event handler.
+
+        Returns True if the event advanced a turn.
+        """
+        return self._step(self.engine.event_handler.dispatch(event))
+
+    def press(self, sym: tcod.event.KeySym) -> bool:
+        """Press the key `sym`.  Returns True if it advanced a turn."""
+        return self.send(key_event(sym))
+
+    def run(self, inputs: Iterable[ScriptedInput]) -> int:
+        """Feed a sequence of actions and events to the engine.
+
+        Stops when the player dies.  Returns the number of turns that were
+        advanced.
+        """
+        start_turns = self.turns
+        for scripted_input in inputs:
+            if not self.engine.player.is_alive:
+                break
+            if isinstance(scripted_input, Action):
+                self.perform(scripted_input)
+            else:
+                self.send(scripted_input)
+        return self.turns - start_turns
+
+    def render(self) -> None:
+        """Render the active handler onto this driver's console, if any."""
+        if self.console is None:
+            return
+        start = time.perf_counter()
+        self.console.clear()
+        self.engine.event_handler.on_render(console=self.console)
+        end = time.perf_counter()
+        if self.engine.profiler is not None:
+            self.engine.profiler.record("render", end - start)
+        if self.engine.tracer is not None:
+            self.engine.tracer.add_span("render", "render", start, end)
+
+    def _step(self, action: Optional[Action]) -> bool:
+        advanced = self.engine.event_handler.handle_action(action)
+        if advanced:
+            self.turns += 1
+        self.render()
+        return advanced
+
+
+def random_walk(engine: Engine, turns: int, rng: random.Random) -> Iterable[Action]:
+    """Yield up to `turns` random bump actions for the player, while they live."""
+    directions = sorted(set(MOVE_KEYS.values()))
+    for _ in range(turns):
+        if not engine.player.is_alive:
+            return
+        dx, dy = rng.choice(directions)
+        yield BumpAction(engine.player, dx, dy)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the game headlessly with a random-walk player.")
+    parser.add_argument("--turns", type=int, default=1000, help="number of player actions to feed")
+    parser.add_argument("--render", action="store_true", help="render every step to an offscreen console")
+    parser.add_argument("--seed", type=int, help="seed for the game and the random walk")
+    parser.add_argument("--record", metavar="FILE", help="write an action log that replay.py can replay")
+    parser.add_argument("--profile", metavar="FILE", help="time every turn phase and write the percentiles to FILE")
+    parser.add_argument("--trace", metavar="FILE", help="write a Chrome trace of the last spans of engine work to FILE")
+    args = parser.parse_args()
+
+    engine = setup_game.new_game(seed=args.seed)
+    console = tcod.console.Console(80, 50, order="F") if args.render else None
+    driver = HeadlessDriver(engine, console)
+    if args.record:
+        from replay import ActionRecorder  # replay builds on this module.
+
+        engine.recorder = ActionRecorder(engine, args.record)
+    if args.profile:
+        engine.profiler = TurnProfiler()
+    if args.trace:
+        engine.tracer = Tracer()
+
+    start = time.perf_counter()
+    turns = driver.run(random_walk(engine, args.turns, random.Random(engine.seed)))
+    elapsed = time.perf_counter() - start
+    if engine.recorder is not None:
+        engine.recorder.close()
+    if engine.profiler is not None:
+        engine.profiler.dump(args.profile)
+    if engine.tracer is not None:
+        engine.tracer.export(args.trace)
+
+    print(
+        f"seed {engine.seed}: {turns} turns in {elapsed:.3f}s ({turns / max(elapsed, 1e-9):.0f} turns/s),"
+        f" player hp {engine.player.fighter.hp}/{engine.player.fighter.max_hp}"
+    )
+
+
+if __name__ == "__main__":
+    main()
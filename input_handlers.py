@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Optional, Any, TYPE_CHECKING
+import time
+from typing import Optional, Any, Iterable, TYPE_CHECKING
 
 import tcod.event
 
@@ -52,16 +53,42 @@ class EventHandler:
     def __init__(self, engine: Engine):
         self.engine = engine
 
-    def handle_events(self, context: tcod.context.Context) -> None:
-        for event in tcod.event.wait():
+    def handle_events(self, context: tcod.context.Context, events: Optional[Iterable[Any]] = None) -> None:
+        """Handle `events`, or wait for new events if none are given."""
+        if events is None:
+            events = tcod.event.wait()
+        for event in events:
             context.convert_event(event)
-            self.dispatch(event)
+            self.handle_action(self.dispatch(event))
+
+    def handle_action(self, action: Optional[Action]) -> bool:
+        """Handle an action returned from an `ev_*` method.
+
+        Returns True if the action advanced a turn.  Outside the main game
+        only quitting is allowed, any other action is ignored.
+        """
+        if not isinstance(action, EscapeAction):
+            return False
+
+        if self.engine.recorder is not None:
+            self.engine.recorder.record(action)
+        action.perform()
+        self.engine.frame_scheduler.request_redraw()
+        return False
     
     def ev_quit(self, event: tcod.event.Quit) -> Optional[Action]:
         raise SystemExit()
     
     def on_render(self, console: tcod.console.Console) -> None:
         self.engine.render(console)
+
+    def on_render_mouse_hover(self, console: tcod.console.Console) -> bool:
+        """Redraw only what depends on the mouse, over the last frame.
+
+        Returns False if this handler can't, and needs a full redraw instead.
+        """
+        self.engine.render_mouse_hover(console)
+        return True
     
     def dispatch(self, event: Any) -> Optional[Action]:
         """Dispatch an event to an `ev_*` method (replacement for EventDispatch).
@@ -104,6 +131,7 @@ class EventHandler:
         return None
 
     def ev_windowexposed(self, event: tcod.event.WindowEvent) -> Optional[Action]:
+        self.engine.frame_scheduler.request_redraw()
         return None
 
     def ev_windowenter(self, event: tcod.event.WindowEvent) -> Optional[Action]:
@@ -119,22 +147,46 @@ class EventHandler:
         return None
     
     def ev_mousemotion(self, event: tcod.event.MouseMotion) -> None:
-        if self.engine.game_map.in_bounds(int(event.position.x), int(event.position.y)):
-            self.engine.mouse_location = int(event.position.x), int(event.position.y)
+        location = int(event.position.x), int(event.position.y)
+        if self.engine.game_map.in_bounds(*location) and location != self.engine.mouse_location:
+            self.engine.mouse_location = location
+            self.engine.frame_scheduler.request_hover_redraw()
 
 class MainGameEventHandler(EventHandler):
-    def handle_events(self, context: tcod.context.Context) -> None:
-        for event in tcod.event.wait():
-            context.convert_event(event)
-            action = self.dispatch(event)
+    def handle_action(self, action: Optional[Action]) -> bool:
+        if action is None:
+            return False
 
-            if action is None:
-                continue
+        if self.engine.recorder is not None:
+            self.engine.recorder.record(action)
 
+        profiler, tracer = self.engine.profiler, self.engine.tracer
+        if profiler is None and tracer is None:
             action.perform()
-
             self.engine.handle_enemy_turns()
             self.engine.update_fov()
+        else:
+            start = time.perf_counter()
+            action.perform()
+            acted = time.perf_counter()
+            self.engine.handle_enemy_turns()
+            enemies_done = time.perf_counter()
+            self.engine.update_fov()
+            end = time.perf_counter()
+            if profiler is not None:
+                profiler.record("player", acted - start)
+                profiler.record("enemies", enemies_done - acted)
+                profiler.record("fov", end - enemies_done)
+            if tracer is not None:
+                tracer.add_span("turn", "turn", start, end, {"turn": self.engine.turn, "action": type(action).__name__})
+                tracer.add_span("player", "turn", start, acted)
+                tracer.add_span("enemies", "turn", acted, enemies_done)
+                tracer.add_span("fov", "fov", enemies_done, end)
+        self.engine.turn += 1
+        if self.engine.recorder is not None:
+            self.engine.recorder.end_turn()
+        self.engine.frame_scheduler.request_redraw()
+        return True
 
 
     def ev_windowclose(self, event: tcod.event.WindowEvent) -> Optional[Action]:
@@ -162,19 +214,25 @@ class MainGameEventHandler(EventHandler):
         elif key == tcod.event.KeySym.V:
             self.engine.event_handler = HistoryViewer(self.engine)
 
+        elif key == tcod.event.KeySym.F3:
+            scheduler = self.engine.frame_scheduler
+            scheduler.show_timings = not scheduler.show_timings
+            scheduler.request_redraw()
+
+        elif key == tcod.event.KeySym.F4 and self.engine.profiler is not None:
+            self.engine.profiler.show_overlay = not self.engine.profiler.show_overlay
+            self.engine.frame_scheduler.request_redraw()
+
         
         return action
     
 
 class GameOverEventHandler(EventHandler):
-    def handle_events(self, context: tcod.context.Context) -> None:
-        for event in tcod.event.wait():
-            action = self.dispatch(event)
-
-            if action is None:
-                continue
-
-            action.perform()
+    def handle_events(self, context: tcod.context.Context, events: Optional[Iterable[Any]] = None) -> None:
+        if events is None:
+            events = tcod.event.wait()
+        for event in events:
+            self.handle_action(self.dispatch(event))
 
 
     def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[Action]:
@@ -201,7 +259,7 @@ class HistoryViewer(EventHandler):
 
     def __init__(self, engine: Engine):
         super().__init__(engine)
-        self.log_length = len(engine.message_log.messages)
+        self.log_length = len(engine.message_log)
         self.cursor = self.log_length - 1
 
     def on_render(self, console: tcod.console.Console) -> None:
@@ -222,12 +280,17 @@ class HistoryViewer(EventHandler):
             1,
             log_console.width - 2,
             log_console.height - 2,
-            self.engine.message_log.messages[: self.cursor + 1],
+            self.engine.message_log.history(self.cursor + 1),
         )
         log_console.blit(console, 3, 3)
 
+    def on_render_mouse_hover(self, console: tcod.console.Console) -> bool:
+        # The history window covers the hover text.
+        return False
+
     def ev_keydown(self, event: tcod.event.KeyDown) -> None:
         # Fancy conditional movement to make it feel right.
+        self.engine.frame_scheduler.request_redraw()
         if event.sym in CURSOR_Y_KEYS:
             adjust = CURSOR_Y_KEYS[event.sym]
             if adjust < 0 and self.cursor == 0:
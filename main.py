@@ -1,64 +1,95 @@
-import copy
+import argparse
+import os
+
 import tcod
+
 import color
+from replay import ActionRecorder
+import save_game
+import setup_game
+from tracing import Tracer
+from turn_profiler import TurnProfiler
 
-from engine import Engine
-import entity_factories
-from procgen import generate_dungeon
+# Turns between automatic saves when playing with --save.
+AUTOSAVE_TURNS = 20
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Hachimi_Dungeon")
+    parser.add_argument("--seed", type=int, help="seed for a reproducible game")
+    parser.add_argument(
+        "--save", metavar="FILE", help="continue the game saved in FILE, and keep saving to it while playing"
+    )
+    parser.add_argument("--record", metavar="FILE", help="write an action log of this game to FILE")
+    parser.add_argument(
+        "--profile", metavar="FILE", help="time every turn phase, show them with F4 and write them to FILE at exit"
+    )
+    parser.add_argument(
+        "--trace", metavar="FILE", help="keep a trace of recent engine work and write it to FILE at exit"
+    )
+    args = parser.parse_args()
+
     screen_width = 80
     screen_height = 50
 
-    map_width = 80
-    map_height = 43
-
-    room_max_size = 10
-    room_min_size = 6
-    max_rooms = 30
-
-    max_monsters_per_room = 2
-
-
     tileset = tcod.tileset.load_tilesheet(
         "dejavu10x10_gs_tc.png", 32, 8, tcod.tileset.CHARMAP_TCOD
     )
 
-    player = copy.deepcopy(entity_factories.player)
-
-    engine = Engine(player=player)
-
-    engine.game_map = generate_dungeon(
-        max_rooms=max_rooms,
-        room_min_size=room_min_size,
-        room_max_size=room_max_size,
-        map_width=map_width,
-        map_height=map_height,
-        max_monsters_per_room=max_monsters_per_room,
-        engine=engine,
-    )
-
-    engine.update_fov()
-
-    engine.message_log.add_message(
-        "Welcome to Hachimi_Dungeon! Prepare to explore and conquer!", color.welcome_text
-    )
-
-    with tcod.context.new(
-        columns=screen_width,
-        rows=screen_height,
-        tileset=tileset,
-        title="Hachimi_Dungeon",
-        vsync=True,
-    ) as context:
-        root_console = tcod.console.Console(screen_width, screen_height, order="F")
-        while True:
-            root_console.clear()
-            engine.event_handler.on_render(console=root_console)
-            context.present(root_console)
-
-            engine.event_handler.handle_events(context)
+    if args.save and os.path.exists(args.save):
+        engine = save_game.load_game(args.save)
+    else:
+        engine = setup_game.new_game(seed=args.seed)
+    # Saves are written on a background thread, so autosaving doesn't stall
+    # the game.
+    saver = save_game.GameSaver()
+    saved_turn = engine.turn
+    if args.record:
+        engine.recorder = ActionRecorder(engine, args.record)
+    if args.profile:
+        engine.profiler = TurnProfiler()
+    if args.trace:
+        engine.tracer = Tracer()
+
+    try:
+        with tcod.context.new(
+            columns=screen_width,
+            rows=screen_height,
+            tileset=tileset,
+            title="Hachimi_Dungeon",
+            vsync=True,
+        ) as context:
+            root_console = tcod.console.Console(screen_width, screen_height, order="F")
+            # Frames are only redrawn after something changed.  Press F3 in
+            # game to show how long rendering and event handling take.
+            scheduler = engine.frame_scheduler
+            while True:
+                scheduler.draw(root_console, context)
+
+                scheduler.handle_events(context)
+
+                if args.save and engine.turn >= saved_turn + AUTOSAVE_TURNS:
+                    try:
+                        saver.save(engine, args.save)
+                    except Exception as exc:
+                        # An earlier autosave failed.  Keep playing, the
+                        # next one tries again.
+                        engine.message_log.add_message(f"Autosave failed: {exc}", color.error_text)
+                    saved_turn = engine.turn
+    finally:
+        if engine.recorder is not None:
+            engine.recorder.close()
+        if engine.profiler is not None:
+            engine.profiler.dump(args.profile)
+        if engine.tracer is not None:
+            engine.tracer.export(args.trace)
+        # Save on the way out too, unless the run is over.  A failed save is
+        # raised from here, after everything else was written.
+        try:
+            if args.save and engine.player.is_alive:
+                saver.save(engine, args.save)
+        finally:
+            saver.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,16 +1,43 @@
-from typing import List, Reversible, Tuple
+from array import array
+from collections import OrderedDict, deque
+import os
+import struct
+import tempfile
+import threading
+from typing import IO, Deque, Dict, Iterator, List, Optional, Reversible, Sequence, Tuple
 import textwrap
 
 import tcod
 
 import color
 
+# Foreground color and stack count of a message spilled to disk.  The text
+# follows as UTF-8.
+SPILLED_HEADER = struct.Struct("<3BI")
+# Spilled messages kept loaded, so scrolling the history doesn't read and
+# re-wrap them on every frame.
+LOADED_SPILLED_MESSAGES = 256
+# Bytes of spilled data read at a time by `MessageLog.read_spilled`.
+SPILL_READ_CHUNK = 1 << 20
+
 
 class Message:
     def __init__(self, text: str, fg: Tuple[int, int, int]):
         self.plain_text = text
         self.fg = fg
-        self.count = 1
+        self._count = 1
+        # Wrapped lines of `full_text` by width.
+        self._wrapped: Dict[int, List[str]] = {}
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @count.setter
+    def count(self, value: int) -> None:
+        # The count is part of the text, so earlier wrapping is stale.
+        self._count = value
+        self._wrapped.clear()
 
     @property
     def full_text(self) -> str:
@@ -19,10 +46,80 @@ class Message:
             return f"{self.plain_text} (x{self.count})"
         return self.plain_text
 
+    def wrap(self, width: int) -> List[str]:
+        """Return `full_text` wrapped to `width`.  The result must not be modified."""
+        lines = self._wrapped.get(width)
+        if lines is None:
+            lines = self._wrapped[width] = textwrap.wrap(self.full_text, width)
+        return lines
+
+
+class MessageHistory(Reversible[Message]):
+    """The first `length` messages of a log, read lazily.
+
+    Creating one copies nothing, and iterating it in reverse only loads the
+    messages that are actually reached.
+    """
+
+    def __init__(self, log: "MessageLog", length: int):
+        self.log = log
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int) -> Message:
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError(index)
+        return self.log.get_message(index)
+
+    def __iter__(self) -> Iterator[Message]:
+        for index in range(self.length):
+            yield self.log.get_message(index)
+
+    def __reversed__(self) -> Iterator[Message]:
+        for index in reversed(range(self.length)):
+            yield self.log.get_message(index)
+
 
 class MessageLog:
-    def __init__(self) -> None:
-        self.messages: List[Message] = []
+    """A log of messages which keeps only the most recent ones in memory.
+
+    Once more than `capacity` messages have been added the oldest are
+    appended to a spill file, `spill_path` or an anonymous temporary file,
+    and read back by offset when the history is viewed.
+    """
+
+    def __init__(self, capacity: int = 1000, spill_path: Optional[str] = None) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.recent: Deque[Message] = deque()
+        # Number of messages moved to the spill file.
+        self.spilled = 0
+        # Offset of every spilled message in the spill file, and of its end.
+        self._offsets = array("Q", [0])
+        self._spill_file: Optional[IO[bytes]] = None
+        # Guards the spill file's position where `read_spilled` can't use
+        # os.pread.
+        self._spill_lock = threading.Lock()
+        # Recently read spilled messages by index, least recently used first.
+        self._loaded: OrderedDict[int, Message] = OrderedDict()
+
+    def __len__(self) -> int:
+        return self.spilled + len(self.recent)
+
+    @property
+    def messages(self) -> MessageHistory:
+        """Every message in this log, oldest first."""
+        return MessageHistory(self, len(self))
+
+    def history(self, length: int) -> MessageHistory:
+        """Return the first `length` messages of this log, without copying them."""
+        return MessageHistory(self, min(length, len(self)))
 
     def add_message(
         self, text: str, fg: Tuple[int, int, int] = color.white, *, stack: bool = True,
@@ -32,10 +129,112 @@ class MessageLog:
         If `stack` is True then the message can stack with a previous message
         of the same text.
         """
-        if stack and self.messages and text == self.messages[-1].plain_text:
-            self.messages[-1].count += 1
+        if stack and self.recent and text == self.recent[-1].plain_text:
+            self.recent[-1].count += 1
         else:
-            self.messages.append(Message(text, fg))
+            # Only the last message can still stack, so anything older can be
+            # written out for good.
+            if len(self.recent) >= self.capacity:
+                self._spill(self.recent.popleft())
+            self.recent.append(Message(text, fg))
+
+    def get_message(self, index: int) -> Message:
+        """Return the message at `index`, reading it from disk if it was spilled."""
+        if index >= self.spilled:
+            return self.recent[index - self.spilled]
+        message = self._loaded.get(index)
+        if message is not None:
+            self._loaded.move_to_end(index)
+            return message
+        assert self._spill_file is not None
+        start, end = self._offsets[index], self._offsets[index + 1]
+        with self._spill_lock:
+            self._spill_file.seek(start)
+            data = self._spill_file.read(end - start)
+        r, g, b, count = SPILLED_HEADER.unpack_from(data)
+        message = Message(data[SPILLED_HEADER.size :].decode("utf-8"), (r, g, b))
+        message.count = count
+        self._loaded[index] = message
+        if len(self._loaded) > LOADED_SPILLED_MESSAGES:
+            self._loaded.popitem(last=False)
+        return message
+
+    def spilled_offsets(self) -> array:
+        """Return a copy of the offsets of the spilled messages.
+
+        The last offset is the size of the spilled data so far, which stays
+        readable with `read_spilled`.
+        """
+        if self._spill_file is not None:
+            # Buffered writes have to reach the file for `read_spilled`.
+            self._spill_file.flush()
+        return array("Q", self._offsets)
+
+    def read_spilled(self, size: int) -> bytes:
+        """Return the first `size` bytes of spilled data.
+
+        The spill file is only ever appended to, so this can run on another
+        thread while messages are still being added.
+        """
+        if size == 0:
+            return b""
+        assert self._spill_file is not None
+        fd = self._spill_file.fileno()
+        chunks = []
+        position = 0
+        while position < size:
+            length = min(size - position, SPILL_READ_CHUNK)
+            if hasattr(os, "pread"):
+                # Doesn't move the file position the game thread uses.
+                chunk = os.pread(fd, length, position)
+            else:
+                with self._spill_lock:
+                    self._spill_file.seek(position)
+                    chunk = self._spill_file.read(length)
+            if not chunk:
+                raise EOFError("The spill file is shorter than the spilled messages.")
+            chunks.append(chunk)
+            position += len(chunk)
+        return b"".join(chunks)
+
+    def restore_spilled(self, data: bytes, offsets: Sequence[int]) -> None:
+        """Make `data`, the first `offsets[-1]` bytes of another log's spilled
+        data, and `offsets` the spilled messages of this log.
+
+        The log must still be empty.
+        """
+        if len(self):
+            raise ValueError("Spilled messages can only be restored into an empty log.")
+        if len(offsets) < 1 or offsets[-1] != len(data):
+            raise ValueError("The offsets don't match the spilled data.")
+        if data:
+            spill_file = self._open_spill_file()
+            spill_file.seek(0)
+            spill_file.write(data)
+        self._offsets = array("Q", offsets)
+        self.spilled = len(offsets) - 1
+
+    def _open_spill_file(self) -> IO[bytes]:
+        if self._spill_file is None:
+            if self.spill_path is None:
+                self._spill_file = tempfile.TemporaryFile()
+            else:
+                self._spill_file = open(self.spill_path, "w+b")
+        return self._spill_file
+
+    def _spill(self, message: Message) -> None:
+        spill_file = self._open_spill_file()
+        data = SPILLED_HEADER.pack(*message.fg, message.count) + message.plain_text.encode("utf-8")
+        with self._spill_lock:
+            spill_file.seek(self._offsets[-1])
+            spill_file.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+        self.spilled += 1
+
+    def close(self) -> None:
+        """Close the spill file.  Spilled messages can't be read afterwards."""
+        if self._spill_file is not None:
+            self._spill_file.close()
 
     def render(
         self, console: tcod.Console, x: int, y: int, width: int, height: int,
@@ -62,8 +261,8 @@ class MessageLog:
         y_offset = height - 1
 
         for message in reversed(messages):
-            for line in reversed(textwrap.wrap(message.full_text, width)):
+            for line in reversed(message.wrap(width)):
                 console.print(x=x, y=y + y_offset, string=line, fg=message.fg)
                 y_offset -= 1
                 if y_offset < 0:
-                    return  # No more space to print messages.
\ No newline at end of file
+                    return  # No more space to print messages.
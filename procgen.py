@@ -4,7 +4,7 @@ from math import e
 import random
 from typing import Tuple, Iterable, List, TYPE_CHECKING
 
-import tcod
+import numpy as np  # type: ignore
 
 import entity_factories
 
@@ -33,47 +33,51 @@ class RectangularRoom:
     def inner(self) -> Tuple[slice, slice]:
         """Return the inner area of this room as a 2D array index."""
         return slice(self.x1 + 1, self.x2), slice(self.y1 + 1, self.y2)
-    
-    def intersects(self, other: RectangularRoom) -> bool:
-        """Return True if this room overlaps with another RectangularRoom."""
-        return (
-            self.x1 <= other.x2
-            and self.x2 >= other.x1
-            and self.y1 <= other.y2
-            and self.y2 >= other.y1
-        )
-    
+
+    @property
+    def outer(self) -> Tuple[slice, slice]:
+        """Return this room including its walls as a 2D array index."""
+        return slice(self.x1, self.x2 + 1), slice(self.y1, self.y2 + 1)
+
+
 def place_entities(
-    room: RectangularRoom, dungeon: GameMap, max_monsters: int
+    room: RectangularRoom, dungeon: GameMap, max_monsters: int, rng: random.Random
 ) -> None:
-    numbers_of_monsters = random.randint(0, max_monsters)
+    numbers_of_monsters = rng.randint(0, max_monsters)
 
     for _ in range(numbers_of_monsters):
-        x = random.randint(room.x1 + 1, room.x2 - 1)
-        y = random.randint(room.y1 + 1, room.y2 - 1)
+        x = rng.randint(room.x1 + 1, room.x2 - 1)
+        y = rng.randint(room.y1 + 1, room.y2 - 1)
 
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
-            if random.random() < 0.8:  # 80% chance of getting an orc
+        if not dungeon.get_entities_at_location(x, y):
+            if rng.random() < 0.8:  # 80% chance of getting an orc
                 entity_factories.orc.spawn(dungeon, x, y)
             else:  # 20% chance of getting a troll
                 entity_factories.troll.spawn(dungeon, x, y)
 
 
 def tunnel_between(
-        start: Tuple[int, int], end: Tuple[int, int]
-    ) -> Iterable[Tuple[int, int]]:
+        start: Tuple[int, int], end: Tuple[int, int], rng: random.Random
+    ) -> Iterable[Tuple[slice, slice]]:
+        """Return the two legs of an L-shaped tunnel as 2D array indices."""
         x1, y1 = start
         x2, y2 = end
 
-        if random.random() < 0.5:
+        if rng.random() < 0.5:
+            # Move horizontally, then vertically.
             corner_x, corner_y = x2, y1
         else:
+            # Move vertically, then horizontally.
             corner_x, corner_y = x1, y2
 
-        for x, y in tcod.los.bresenham((x1, y1), (corner_x, corner_y)).tolist():
-            yield x, y
-        for x, y in tcod.los.bresenham((corner_x, corner_y), (x2, y2)).tolist():
-            yield x, y
+        # Each leg is a straight line, so it can be carved as a single slice.
+        yield line_slice(x1, corner_x), line_slice(y1, corner_y)
+        yield line_slice(corner_x, x2), line_slice(corner_y, y2)
+
+
+def line_slice(a: int, b: int) -> slice:
+    """Return a slice covering a and b inclusively, in either order."""
+    return slice(min(a, b), max(a, b) + 1)
 
 
 def generate_dungeon(
@@ -84,42 +88,55 @@ def generate_dungeon(
     map_height: int,
     max_monsters_per_room: int,
     engine: Engine,
+    rng: random.Random,
 ) -> GameMap:
-    """Generate a new dungeon map."""
+    """Generate a new dungeon map.
+
+    Every random decision is drawn from `rng`, so the same seed always
+    generates the same floor.
+    """
     player = engine.player
     dungeon = GameMap(engine, map_width, map_height, entities=[player])
 
     rooms: List[RectangularRoom] = []
+    # Cells covered by an accepted room, walls included.  Checking a new room
+    # against this mask costs the same no matter how many rooms exist.
+    room_mask = np.zeros((map_width, map_height), dtype=bool, order="F")
+    # Cells to dig out.  The tiles are written once all rooms are placed.
+    floor_mask = np.zeros((map_width, map_height), dtype=bool, order="F")
 
     for r in range(max_rooms):
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
+        room_width = rng.randint(room_min_size, room_max_size)
+        room_height = rng.randint(room_min_size, room_max_size)
 
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = rng.randint(0, dungeon.width - room_width - 1)
+        y = rng.randint(0, dungeon.height - room_height - 1)
 
         # "RectangularRoom" class makes rectangles easier to work with
         new_room = RectangularRoom(x, y, room_width, room_height)
 
-        # Run through the other rooms and see if they intersect with this one.
-        if any(new_room.intersects(other_room) for other_room in rooms):
+        # See if this room intersects any of the other rooms.
+        if room_mask[new_room.outer].any():
             continue  # This room intersects, so go to the next attempt.
         # If there are no intersections then the room is valid.
+        room_mask[new_room.outer] = True
 
         # Dig out this rooms inner area.
-        dungeon.tiles[new_room.inner] = tile_types.floor
+        floor_mask[new_room.inner] = True
 
         if len(rooms) == 0:
             # The first room, where the player starts.
             player.place(*new_room.center, dungeon)
         else:  # All rooms after the first.
             # Dig out a tunnel between this room and the previous one.
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
-                dungeon.tiles[x, y] = tile_types.floor
+            for tunnel in tunnel_between(rooms[-1].center, new_room.center, rng):
+                floor_mask[tunnel] = True
         # Add some monsters.
-        place_entities(new_room, dungeon, max_monsters_per_room)
+        place_entities(new_room, dungeon, max_monsters_per_room, rng)
 
         # Finally, append the new room to the list.
         rooms.append(new_room)
 
+    dungeon.set_tiles(floor_mask, tile_types.floor_id)
+
     return dungeon
\ No newline at end of file
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict
 
 import color
 
@@ -16,7 +16,7 @@ def get_names_at_location(x: int, y: int, game_map: GameMap) -> str:
         return ""
 
     names = ", ".join(
-        entity.name for entity in game_map.entities if entity.x == x and entity.y == y
+        entity.name for entity in game_map.get_entities_at_location(x, y)
     )
     return names.capitalize()
 
@@ -41,4 +41,26 @@ def render_bar(
 def render_names_at_mouse_location(console: Console, x: int, y: int, engine: Engine) -> None:
     mouse_x, mouse_y = engine.mouse_location
     names_at_mouse_location = get_names_at_location(mouse_x, mouse_y, engine.game_map)
-    console.print(x=x, y=y, string=names_at_mouse_location)
\ No newline at end of file
+    console.print(x=x, y=y, string=names_at_mouse_location)
+
+
+def render_frame_timings(console: Console, x: int, y: int, averages: Dict[str, float]) -> None:
+    """Render the mean frame timings from a FrameScheduler."""
+    console.print(x=x, y=y, string=f"render  {averages['render']:6.2f}ms", fg=color.timings_text)
+    console.print(x=x, y=y + 1, string=f"present {averages['present']:6.2f}ms", fg=color.timings_text)
+    console.print(x=x, y=y + 2, string=f"events  {averages['events']:6.2f}ms", fg=color.timings_text)
+    console.print(
+        x=x, y=y + 3, string=f"{averages['redrawn']}/{averages['frames']} redrawn", fg=color.timings_text
+    )
+
+
+def render_turn_profile(console: Console, x: int, y: int, summary: Dict[str, Dict[str, float]]) -> None:
+    """Render the percentiles of each turn phase from a TurnProfiler."""
+    console.print(x=x, y=y, string=f"{'phase':<16}{'p50':>6}{'p90':>6}{'p99':>6}ms", fg=color.timings_text)
+    for row, (phase, stats) in enumerate(sorted(summary.items()), start=1):
+        console.print(
+            x=x,
+            y=y + row,
+            string=f"{phase[:16]:<16}{stats['p50_ms']:6.2f}{stats['p90_ms']:6.2f}{stats['p99_ms']:6.2f}",
+            fg=color.timings_text,
+        )
@@ -0,0 +1,219 @@
+"""Record the actions of a game and replay them deterministically.
+
+A log starts with the game's seed and floor parameters, followed by one
+record per action the player performed and, every few turns, a checksum of
+the game state.  Everything else in a game follows from those, so replaying
+the log rebuilds the same game, and a checksum that doesn't match shows
+where it went differently.
+
+Replay a log as fast as possible with:
+
+    python replay.py game.log
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import struct
+import time
+from typing import IO, Any, Dict, Iterator, NamedTuple, Optional, Tuple, Type, Union
+import zlib
+
+from actions import (
+    Action,
+    ActionWithDirection,
+    BumpAction,
+    EscapeAction,
+    MeleeAction,
+    MovementAction,
+    WaitAction,
+)
+from engine import Engine
+from entity import Actor
+from headless import HeadlessDriver
+import setup_game
+
+MAGIC = b"HACHIREP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHQI")  # Magic, version, seed, length of the JSON parameters.
+# Action type, actor id, dx, dy.
+ACTION_RECORD = struct.Struct("<BIbb")
+# Record type, turn, state checksum.
+CHECKSUM_RECORD = struct.Struct("<BII")
+CHECKSUM = 0xFF
+
+# Action classes by the type id stored in the log.
+ACTION_TYPES: Tuple[Type[Action], ...] = (
+    EscapeAction,
+    WaitAction,
+    BumpAction,
+    MovementAction,
+    MeleeAction,
+)
+# The actor id of the player.  Only the player's actions are recorded.
+PLAYER_ID = 0
+
+
+class ReplayDivergence(Exception):
+    """The replayed game didn't reach the state that was recorded."""
+
+    def __init__(self, turn: int, expected: int, actual: int):
+        super().__init__(f"State checksum at turn {turn} is {actual:08x}, the log expects {expected:08x}.")
+        self.turn = turn
+        self.expected = expected
+        self.actual = actual
+
+
+class ActionRecord(NamedTuple):
+    action_type: Type[Action]
+    actor_id: int
+    dx: int
+    dy: int
+
+
+class ChecksumRecord(NamedTuple):
+    turn: int
+    checksum: int
+
+
+def state_checksum(engine: Engine) -> int:
+    """Return a CRC-32 of the parts of the game state that actions change."""
+    game_map = engine.game_map
+    checksum = zlib.crc32(struct.pack("<II", engine.turn, len(engine.message_log)))
+    checksum = zlib.crc32(game_map.explored.bits.tobytes(), checksum)
+    for entity in game_map.entities:
+        hp = entity.fighter.hp if isinstance(entity, Actor) else 0
+        checksum = zlib.crc32(struct.pack("<iii", entity.x, entity.y, hp), checksum)
+    return checksum
+
+
+class ActionRecorder:
+    """Write the player's actions in `engine` to a log at `path`.
+
+    Recording has to start with a new game from `setup_game.new_game`.  The
+    event handlers pass every action they perform to `record`, and a state
+    checksum is added every `checksum_interval` turns.
+    """
+
+    def __init__(self, engine: Engine, path: str, checksum_interval: int = 50):
+        if engine.turn != 0:
+            raise ValueError("Recording has to start with a new game.")
+        self.engine = engine
+        self.checksum_interval = checksum_interval
+        self.file: IO[bytes] = open(path, "wb")
+        params = json.dumps(engine.floors.floor_params).encode("utf-8")
+        self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION, engine.seed, len(params)))
+        self.file.write(params)
+
+    def record(self, action: Action) -> None:
+        """Write `action`, which is about to be performed, to the log."""
+        if isinstance(action, ActionWithDirection):
+            dx, dy = action.dx, action.dy
+        else:
+            dx = dy = 0
+        self.file.write(ACTION_RECORD.pack(ACTION_TYPES.index(type(action)), PLAYER_ID, dx, dy))
+
+    def end_turn(self) -> None:
+        """Called once the turn of a recorded action is over."""
+        if self.engine.turn % self.checksum_interval == 0:
+            self.file.write(CHECKSUM_RECORD.pack(CHECKSUM, self.engine.turn, state_checksum(self.engine)))
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> ActionRecorder:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def read_log(path: str) -> Tuple[int, Dict[str, Any], Iterator[Union[ActionRecord, ChecksumRecord]]]:
+    """Return the seed, floor parameters and records of the log at `path`."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, seed, params_length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not an action log.")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path} was recorded in an unsupported format, version {version}.")
+    offset = HEADER.size + params_length
+    floor_params = json.loads(data[HEADER.size : offset].decode("utf-8"))
+
+    def records() -> Iterator[Union[ActionRecord, ChecksumRecord]]:
+        position = offset
+        while position < len(data):
+            if data[position] == CHECKSUM:
+                _, turn, checksum = CHECKSUM_RECORD.unpack_from(data, position)
+                position += CHECKSUM_RECORD.size
+                yield ChecksumRecord(turn, checksum)
+            else:
+                action_type, actor_id, dx, dy = ACTION_RECORD.unpack_from(data, position)
+                position += ACTION_RECORD.size
+                yield ActionRecord(ACTION_TYPES[action_type], actor_id, dx, dy)
+
+    return seed, floor_params, records()
+
+
+class ReplayResult(NamedTuple):
+    engine: Engine
+    actions: int
+    turns: int
+    checksums: int
+    seconds: float
+
+
+def replay(path: str, verify: bool = True) -> ReplayResult:
+    """Replay the log at `path` headlessly and return the finished game.
+
+    If `verify` is True then every recorded checksum is compared with the
+    replayed state, and ReplayDivergence is raised on the first mismatch.
+    """
+    seed, floor_params, records = read_log(path)
+    engine = setup_game.new_game(seed=seed, **floor_params)
+    driver = HeadlessDriver(engine)
+    actions = checksums = 0
+
+    start = time.perf_counter()
+    for record in records:
+        if isinstance(record, ChecksumRecord):
+            if verify:
+                actual = state_checksum(engine)
+                if actual != record.checksum:
+                    raise ReplayDivergence(record.turn, record.checksum, actual)
+                checksums += 1
+            continue
+        if record.action_type is EscapeAction:
+            break  # The game was quit here.
+        action: Action
+        if issubclass(record.action_type, ActionWithDirection):
+            action = record.action_type(engine.player, record.dx, record.dy)
+        else:
+            action = record.action_type(engine.player)
+        driver.perform(action)
+        actions += 1
+    seconds = time.perf_counter() - start
+
+    return ReplayResult(engine, actions, driver.turns, checksums, seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded game as fast as possible.")
+    parser.add_argument("log", help="action log written with --record")
+    parser.add_argument("--no-verify", action="store_true", help="skip comparing state checksums")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the log this many times")
+    args = parser.parse_args()
+
+    best: Optional[float] = None
+    for _ in range(args.repeat):
+        result = replay(args.log, verify=not args.no_verify)
+        best = result.seconds if best is None else min(best, result.seconds)
+    assert best is not None
+    print(
+        f"{result.actions} actions, {result.turns} turns, {result.checksums} checksums verified"
+        f" in {best:.3f}s ({result.turns / max(best, 1e-9):.0f} turns/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
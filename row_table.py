@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np  # type: ignore
+
+if TYPE_CHECKING:
+    from entity import Entity
+
+E = TypeVar("E", bound="Entity")
+
+
+class RowTable(Generic[E]):
+    """Base for struct-of-arrays tables holding one row per entity.
+
+    Subclasses list their arrays in `columns` as name: (dtype, shape of one
+    row).  Every table has a `used` column, and the rows of removed entities
+    are reused.
+    """
+
+    columns: Dict[str, Tuple[type, Tuple[int, ...]]] = {}
+
+    def __init__(self, capacity: int = 64):
+        self.used = np.zeros(capacity, dtype=bool)
+        for name, (dtype, shape) in self.columns.items():
+            setattr(self, name, np.zeros((capacity, *shape), dtype=dtype))
+
+        self.entities: List[Optional[E]] = [None] * capacity
+        self.rows: Dict[E, int] = {}
+        self._free_rows = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, entity: object) -> bool:
+        return entity in self.rows
+
+    def row_of(self, entity: E) -> int:
+        """Return the row of `entity`, adding one for it if needed."""
+        row = self.rows.get(entity)
+        if row is None:
+            if not self._free_rows:
+                self._grow()
+            row = self._free_rows.pop()
+            self.rows[entity] = row
+            self.entities[row] = entity
+            self.used[row] = True
+        return row
+
+    def add_rows(self, entities: Sequence[E]) -> np.ndarray:
+        """Add a row for each of `entities`, which must not have one yet.
+
+        Returns the new rows, in the same order.  The columns of the rows
+        are left for the caller to fill in.
+        """
+        while len(self._free_rows) < len(entities):
+            self._grow()
+        rows = np.array(self._free_rows[len(self._free_rows) - len(entities):][::-1], dtype=np.intp)
+        del self._free_rows[len(self._free_rows) - len(entities):]
+        for entity, row in zip(entities, rows.tolist()):
+            if entity in self.rows:
+                raise ValueError(f"{entity!r} already has a row.")
+            self.rows[entity] = row
+            self.entities[row] = entity
+        self.used[rows] = True
+        return rows
+
+    def remove(self, entity: E) -> None:
+        row = self.rows.pop(entity)
+        self.entities[row] = None
+        self.used[row] = False
+        self._free_rows.append(row)
+
+    def _grow(self) -> None:
+        old_capacity = len(self.entities)
+        new_capacity = old_capacity * 2
+        for name in ("used", *self.columns):
+            old = getattr(self, name)
+            new = np.zeros((new_capacity, *old.shape[1:]), dtype=old.dtype)
+            new[:old_capacity] = old
+            setattr(self, name, new)
+        self.entities.extend([None] * (new_capacity - old_capacity))
+        self._free_rows.extend(range(new_capacity - 1, old_capacity - 1, -1))
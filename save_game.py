@@ -0,0 +1,269 @@
+"""Save and load games in a compact binary format.
+
+A save file is a JSON header followed by raw array buffers:
+
+    b"HACHIMI\\0" | header length (u64) | JSON header | padding | arrays...
+
+The header records the dtype, shape and offset of every array, and the rest
+of the game state, which is small.  The active floor's tiles and masks are
+stored as they are in memory and entities as one record per row (see
+`map_records`), so loading memory-maps them instead of parsing anything.
+Messages spilled from the message log are stored as they are in the spill
+file, with their offsets, and each inactive floor as the floor manager
+compressed it.  Nothing is pickled, so loading a save can't run code.
+"""
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import json
+import os
+import struct
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+from engine import Engine
+from entity import Actor
+from floor_manager import FloorManager
+from game_map import GameMap
+from input_handlers import GameOverEventHandler
+from map_records import build_map, map_arrays
+from message_log import Message, MessageLog
+
+MAGIC = b"HACHIMI\0"
+FORMAT_VERSION = 2
+# Arrays start on multiples of this, so they can be mapped efficiently.
+ALIGNMENT = 64
+# Array names of the inactive floors, by depth.
+FLOOR_ARRAY = "floor_{}"
+
+
+class Snapshot(NamedTuple):
+    """Everything needed to write a save file, detached from the live game.
+
+    Except for spilled messages: only their offsets are copied, and the
+    data is read from `message_log`'s spill file, which is only ever
+    appended to, when the snapshot is written.
+    """
+
+    arrays: Dict[str, np.ndarray]
+    meta: Dict[str, Any]
+    message_log: MessageLog
+
+
+def take_snapshot(engine: Engine) -> Snapshot:
+    """Copy the state of `engine` so it can be written while the game goes on.
+
+    The arrays of the active floor are copied.  Inactive floors are stored
+    as the floor manager compressed them when they were left.
+    """
+    game_map = engine.game_map
+    _read_into_memory(game_map)
+    arrays = map_arrays(game_map)
+    for name in ("tile_ids", "walkable", "transparent", "explored"):
+        arrays[name] = arrays[name].copy(order="K")
+    arrays["visible"] = game_map.visible.bits.copy()
+
+    # Spilled messages never change, so their offsets are enough to read
+    # them later.
+    arrays["message_offsets"] = np.frombuffer(engine.message_log.spilled_offsets(), dtype=np.uint64)
+
+    floors = engine.floors
+    for depth, data in {**floors.compressed, **floors.live_compressed}.items():
+        arrays[FLOOR_ARRAY.format(depth)] = np.frombuffer(data, dtype=np.uint8)
+
+    meta = {
+        "seed": engine.seed,
+        "turn": engine.turn,
+        "player": list(game_map.entities).index(engine.player),
+        "fov_window": game_map.fov_window,
+        "messages": [(message.plain_text, message.fg, message.count) for message in engine.message_log.recent],
+        "floor_params": floors.floor_params,
+        "live_floors": floors.live_floors,
+        "depth": floors.depth,
+        "exits": [(depth, x, y) for depth, (x, y) in floors.exits.items()],
+        "floors": sorted({**floors.compressed, **floors.live_compressed}),
+    }
+    return Snapshot(arrays, meta, engine.message_log)
+
+
+def write_snapshot(snapshot: Snapshot, path: str) -> None:
+    """Write `snapshot` to `path`.
+
+    The file is written next to `path` first and then moved over it, so a
+    crash while saving leaves the previous save intact.
+    """
+    arrays = dict(snapshot.arrays)
+    spilled_size = int(arrays["message_offsets"][-1])
+    arrays["spilled_messages"] = np.frombuffer(snapshot.message_log.read_spilled(spilled_size), dtype=np.uint8)
+
+    layout: Dict[str, Dict[str, Any]] = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {
+            "dtype": np.lib.format.dtype_to_descr(array.dtype),
+            "shape": array.shape,
+            "fortran_order": bool(array.flags.f_contiguous and not array.flags.c_contiguous),
+            "offset": offset,
+        }
+        offset = _align(offset + array.nbytes)
+    header = json.dumps({"version": FORMAT_VERSION, "arrays": layout, "meta": snapshot.meta}).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(array.tobytes(order="F" if layout[name]["fortran_order"] else "C"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def save_game(engine: Engine, path: str) -> None:
+    """Save `engine` to `path`, blocking until the file is written."""
+    write_snapshot(take_snapshot(engine), path)
+
+
+def load_game(path: str) -> Engine:
+    """Return the game saved at `path`.
+
+    The active floor's arrays are memory-mapped copy-on-write, so only the
+    pages the game touches are read and the file itself is never changed.
+    """
+    meta, arrays = _map_arrays(path)
+
+    game_map = build_map(arrays, None)
+    player = list(game_map.entities)[meta["player"]]
+    if not isinstance(player, Actor):
+        raise ValueError(f"{path} doesn't have a player.")
+    engine = Engine(player=player, seed=meta["seed"])
+    engine.turn = meta["turn"]
+    game_map.engine = engine
+    game_map.visible.bits = arrays["visible"]
+    game_map.fov_window = tuple(meta["fov_window"]) if meta["fov_window"] is not None else None
+    engine.game_map = game_map
+
+    engine.message_log.restore_spilled(
+        arrays["spilled_messages"].tobytes(), arrays["message_offsets"].tolist()
+    )
+    for text, fg, count in meta["messages"]:
+        message = Message(text, tuple(fg))
+        message.count = count
+        engine.message_log.recent.append(message)
+
+    floors = FloorManager(engine, meta["floor_params"], live_floors=meta["live_floors"])
+    floors.depth = meta["depth"]
+    floors.exits = {depth: (x, y) for depth, x, y in meta["exits"]}
+    floors.compressed = {depth: arrays[FLOOR_ARRAY.format(depth)].tobytes() for depth in meta["floors"]}
+    engine.floors = floors
+
+    if not player.is_alive:
+        engine.event_handler = GameOverEventHandler(engine)
+    return engine
+
+
+class GameSaver:
+    """Save games on a background thread.
+
+    The snapshot is taken on the calling thread, which is cheap, and the
+    file is written on a worker thread so the turn loop doesn't wait for
+    the disk.  Saves are written one at a time, in order.  A write that
+    failed is raised from the next call to `save` or `close`.
+    """
+
+    def __init__(self) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.last_save: Optional[Future[None]] = None
+        # The first exception raised by a write since it was last reported.
+        self.error: Optional[BaseException] = None
+
+    def save(self, engine: Engine, path: str) -> Future[None]:
+        """Start saving `engine` to `path` and return the pending write.
+
+        If an earlier write failed its exception is raised instead, and no
+        new save is started.
+        """
+        self._raise_error()
+        self.last_save = self.executor.submit(write_snapshot, take_snapshot(engine), path)
+        self.last_save.add_done_callback(self._write_done)
+        return self.last_save
+
+    def close(self) -> None:
+        """Wait for pending saves to finish and stop the worker thread.
+
+        Raises the exception of a write that failed.
+        """
+        self.executor.shutdown()
+        self._raise_error()
+
+    def _write_done(self, future: Future[None]) -> None:
+        # Runs on the worker thread.  Only the first failure is kept.
+        error = future.exception()
+        if error is not None and self.error is None:
+            self.error = error
+
+    def _raise_error(self) -> None:
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def __enter__(self) -> GameSaver:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _read_into_memory(game_map: GameMap) -> None:
+    """Replace arrays still mapped from a save file with copies in memory.
+
+    An open mapping stops the file from being replaced on Windows.
+    """
+    for name in ("tile_ids", "walkable", "transparent"):
+        array = getattr(game_map, name)
+        if isinstance(array, np.memmap):
+            setattr(game_map, name, np.array(array, order="F"))
+    if isinstance(game_map.palette, np.memmap):
+        game_map.palette = np.array(game_map.palette)
+    for mask in (game_map.visible, game_map.explored):
+        if isinstance(mask.bits, np.memmap):
+            mask.bits = np.array(mask.bits)
+
+
+def _map_arrays(path: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Return the meta data and the memory-mapped arrays of the save at `path`."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a save file.")
+        (header_length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_length).decode("utf-8"))
+    if header["version"] != FORMAT_VERSION:
+        raise ValueError(f"{path} was saved in an unsupported format, version {header['version']}.")
+
+    data_start = _align(len(MAGIC) + 8 + header_length)
+    arrays = {}
+    for name, layout in header["arrays"].items():
+        dtype = np.lib.format.descr_to_dtype(layout["dtype"])
+        if dtype.hasobject:
+            raise ValueError(f"{path} stores Python objects in {name}.")
+        shape = tuple(layout["shape"])
+        if dtype.itemsize * int(np.prod(shape)) == 0:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+            continue
+        arrays[name] = np.memmap(
+            path,
+            dtype=dtype,
+            mode="c",
+            offset=data_start + layout["offset"],
+            shape=shape,
+            order="F" if layout["fortran_order"] else "C",
+        )
+    return header["meta"], arrays
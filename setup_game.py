@@ -0,0 +1,47 @@
+"""Build new game sessions, independent of any window or tileset."""
+from __future__ import annotations
+
+from typing import Optional
+
+import color
+from engine import Engine
+import entity_factories
+from floor_manager import FloorManager
+from procgen import generate_dungeon
+
+
+def new_game(
+    seed: Optional[int] = None,
+    map_width: int = 80,
+    map_height: int = 43,
+    room_max_size: int = 10,
+    room_min_size: int = 6,
+    max_rooms: int = 30,
+    max_monsters_per_room: int = 2,
+) -> Engine:
+    """Return a brand new game session as an Engine instance.
+
+    A random seed is chosen if `seed` is None.
+    """
+    player = entity_factories.player.build()
+
+    engine = Engine(player=player, seed=seed)
+
+    floor_params = dict(
+        max_rooms=max_rooms,
+        room_min_size=room_min_size,
+        room_max_size=room_max_size,
+        map_width=map_width,
+        map_height=map_height,
+        max_monsters_per_room=max_monsters_per_room,
+    )
+    engine.game_map = generate_dungeon(**floor_params, engine=engine, rng=engine.floor_rng(1))
+    engine.floors = FloorManager(engine, floor_params)
+
+    engine.update_fov()
+
+    engine.message_log.add_message(
+        "Welcome to Hachimi_Dungeon! Prepare to explore and conquer!", color.welcome_text
+    )
+
+    return engine
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np  # type: ignore
+
+from row_table import RowTable
+
+if TYPE_CHECKING:
+    from tcod.console import Console
+    from bit_mask import BitMask
+    from entity import Entity
+
+
+class SpriteTable(RowTable["Entity"]):
+    """The position and glyph of every entity in one render order bucket.
+
+    Kept as arrays so that all visible entities in the bucket can be drawn
+    with a single masked assignment into the console.
+    """
+
+    columns = {
+        "x": (np.int32, ()),
+        "y": (np.int32, ()),
+        "ch": (np.int32, ()),
+        "fg": (np.uint8, (3,)),
+    }
+
+    def update(self, entity: Entity) -> None:
+        """Write the current position and glyph of `entity`."""
+        row = self.row_of(entity)
+        self.x[row] = entity.x
+        self.y[row] = entity.y
+        self.ch[row] = ord(entity.char)
+        self.fg[row] = entity.color
+
+    def add_many(self, entities: Sequence[Entity]) -> None:
+        """Add rows for `entities`, none of which are in this table yet, in one pass."""
+        rows = self.add_rows(entities)
+        count = len(entities)
+        self.x[rows] = np.fromiter((entity.x for entity in entities), np.int32, count)
+        self.y[rows] = np.fromiter((entity.y for entity in entities), np.int32, count)
+        self.ch[rows] = np.fromiter((ord(entity.char) for entity in entities), np.int32, count)
+        self.fg[rows] = np.array([entity.color for entity in entities], dtype=np.uint8).reshape(count, 3)
+
+    def draw(self, console: Console, visible: BitMask) -> None:
+        """Draw every entity in this bucket that stands on a visible cell."""
+        mask = self.used & visible[self.x, self.y]
+        x = self.x[mask]
+        y = self.y[mask]
+        console.rgb["ch"][x, y] = self.ch[mask]
+        console.rgb["fg"][x, y] = self.fg[mask]
@@ -0,0 +1,51 @@
+"""Run with `python -m pytest` from the project root."""
+import random
+
+import pytest
+import tcod.event
+
+from actions import BumpAction, WaitAction
+from headless import HeadlessDriver, random_walk
+from input_handlers import GameOverEventHandler
+import setup_game
+
+
+def game_state(engine):
+    return (
+        engine.turn,
+        len(engine.message_log),
+        [(entity.name, entity.x, entity.y) for entity in engine.game_map.entities],
+        [actor.fighter.hp for actor in engine.game_map.actor_table.entities if actor is not None],
+        engine.game_map.explored.bits.tobytes(),
+    )
+
+
+def test_nothing_moves_after_the_player_dies():
+    engine = setup_game.new_game(seed=4)
+    driver = HeadlessDriver(engine)
+    driver.run(random_walk(engine, 5000, random.Random(engine.seed)))
+    assert not engine.player.is_alive
+    assert isinstance(engine.event_handler, GameOverEventHandler)
+
+    state = game_state(engine)
+    turns = driver.turns
+    directions = [(0, 1), (1, 0), (0, -1), (-1, 0), (1, 1), (-1, -1)]
+    for dx, dy in directions:
+        assert not driver.perform(BumpAction(engine.player, dx, dy))
+        assert not engine.event_handler.handle_action(BumpAction(engine.player, dx, dy))
+    assert not driver.perform(WaitAction(engine.player))
+    assert not driver.press(tcod.event.KeySym.LEFT)
+    assert list(random_walk(engine, 10, random.Random(1))) == []
+    assert driver.run([BumpAction(engine.player, 1, 0)]) == 0
+
+    assert driver.turns == turns
+    assert game_state(engine) == state
+
+
+def test_escape_still_quits_after_the_player_dies():
+    engine = setup_game.new_game(seed=4)
+    driver = HeadlessDriver(engine)
+    driver.run(random_walk(engine, 5000, random.Random(engine.seed)))
+    assert not engine.player.is_alive
+    with pytest.raises(SystemExit):
+        driver.press(tcod.event.KeySym.ESCAPE)
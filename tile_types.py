@@ -46,4 +46,10 @@ wall = new_tile(
     transparent=False,
     dark=(ord(" "), (255, 255, 255), (0, 0, 100)),
     light=(ord(" "), (255, 255, 255), (130, 110, 50)),
-)
\ No newline at end of file
+)
+
+# Every tile type, indexed by tile id.  Maps store one id byte per cell and
+# look the rest up here.
+palette = np.array([wall, floor], dtype=tile_dt)
+wall_id = 0
+floor_id = 1
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from collections import deque
+import json
+import os
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Name, category, start and end in perf_counter seconds, and extra details.
+Span = Tuple[str, str, float, float, Optional[Dict[str, Any]]]
+
+
+class Tracer:
+    """Record timed spans of engine work into a fixed-size ring buffer.
+
+    Set an instance as `Engine.tracer` to turn tracing on.  Turns, the
+    phases of a turn, every AI `perform`, path searches, FOV updates and
+    renders are recorded.  Recording a span is a single deque append, and
+    only the last `capacity` spans are kept, so tracing can stay on for
+    whole sessions.  `export` writes the buffer in the Chrome trace event
+    format, which chrome://tracing, Perfetto and speedscope can open.
+    """
+
+    def __init__(self, capacity: int = 100_000):
+        self.spans: Deque[Span] = deque(maxlen=capacity)
+
+    def add_span(
+        self, name: str, category: str, start: float, end: float, args: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.spans.append((name, category, start, end, args))
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Return the recorded spans as a Chrome trace event document."""
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = []
+        for name, category, start, end, args in self.spans:
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",  # A complete event, with a duration.
+                "ts": start * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": pid,
+                "tid": 0,
+            }
+            if args:
+                event["args"] = args
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str) -> None:
+        """Write the recorded spans to `path` as Chrome trace event JSON."""
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
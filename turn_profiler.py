@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from collections import deque
+import json
+from typing import Deque, Dict
+
+import numpy as np  # type: ignore
+
+PERCENTILES = (50, 90, 99)
+
+
+class TurnProfiler:
+    """Rolling timings of each phase of a turn.
+
+    Set an instance as `Engine.profiler` to turn profiling on.  The phases
+    are "player" (the player's action), "enemies" (all enemy turns), one
+    "ai:<class name>" per AI class, "fov" and "render".  Only the last
+    `history` samples of each phase are kept.
+    """
+
+    def __init__(self, history: int = 1000):
+        self.history = history
+        self.samples: Dict[str, Deque[float]] = {}
+        # Whether the profile overlay is drawn.
+        self.show_overlay = False
+
+    def record(self, phase: str, seconds: float) -> None:
+        samples = self.samples.get(phase)
+        if samples is None:
+            samples = self.samples[phase] = deque(maxlen=self.history)
+        samples.append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return the count, mean, percentiles and maximum of each phase, in milliseconds."""
+        summary = {}
+        for phase, samples in self.samples.items():
+            times = np.fromiter(samples, dtype=np.float64, count=len(samples)) * 1000
+            stats = {"count": len(times), "mean_ms": float(times.mean())}
+            for percentile, value in zip(PERCENTILES, np.percentile(times, PERCENTILES)):
+                stats[f"p{percentile}_ms"] = float(value)
+            stats["max_ms"] = float(times.max())
+            summary[phase] = stats
+        return summary
+
+    def dump(self, path: str) -> None:
+        """Write the summary to `path` as JSON."""
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)